@@ -1,6 +1,5 @@
 import math
-import matplotlib.pyplot as plt
-from matplotlib.patches import Polygon
+from render import new_figure, draw_polygons, polygons_limits, finish_figure
 
 def tr_translate(polygons, dx, dy):
     def translate(poly):
@@ -33,24 +32,20 @@ def tr_homothety(polygons, k):
         return tuple((x * k, y * k) for x, y in poly)
     return list(map(scale, polygons))
 
-def visualize_single(polygons, title):
-    fig, ax = plt.subplots(figsize=(6,6))
+def visualize_single(polygons, title, path=None):
+    fig, ax = new_figure((6,6), path)
 
-    xs = [x for poly in polygons for x, y in poly]
-    ys = [y for poly in polygons for x, y in poly]
-    xmin, xmax, ymin, ymax = min(xs), max(xs), min(ys), max(ys)
+    xmin, xmax, ymin, ymax = polygons_limits(polygons, margin=1)
 
-    for poly in polygons:
-        patch = Polygon(poly, closed=True, edgecolor='black', facecolor='none', lw=1.5)
-        ax.add_patch(patch)
+    draw_polygons(ax, polygons, edgecolor='black', facecolor='none', lw=1.5)
 
     ax.set_title(title)
-    ax.set_xlim(xmin - 1, xmax + 1)
-    ax.set_ylim(ymin - 1, ymax + 1)
+    ax.set_xlim(xmin, xmax)
+    ax.set_ylim(ymin, ymax)
     ax.set_aspect('equal')
     ax.grid(True)
 
-    plt.show()
+    finish_figure(fig, path)
 
 if __name__ == "__main__":
     def generate_squares(n, step=2):
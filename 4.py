@@ -1,7 +1,6 @@
 import math
 import itertools
-import matplotlib.pyplot as plt
-from matplotlib.patches import Polygon
+from render import new_figure, draw_polygons, finish_figure
 
 def gen_rectangle():
     i = 0
@@ -41,24 +40,20 @@ def tr_rotate(polygons, angle_rad):
         return tuple((x*cos_a - y*sin_a, x*sin_a + y*cos_a) for x,y in poly)
     return map(rotate_poly, polygons)
 
-def visualize(polygons_sequences, colors, labels, title):
-    plt.figure(figsize=(10,6))
-    ax = plt.gca()
+def visualize(polygons_sequences, colors, labels, title, path=None):
+    fig, ax = new_figure((10,6), path)
     max_polygons = 15
     for polys, color, label in zip(polygons_sequences, colors, labels):
         polys_list = list(itertools.islice(polys, max_polygons))
-        for poly in polys_list:
-            patch = Polygon(poly, closed=True, edgecolor=color, facecolor='none', lw=2)
-            ax.add_patch(patch)
-        patch = Polygon(polys_list[0], closed=True, edgecolor=color, facecolor='none', lw=3, label=label)
-        ax.add_patch(patch)
+        draw_polygons(ax, polys_list, edgecolor=color, facecolor='none', lw=2)
+        draw_polygons(ax, polys_list[:1], edgecolor=color, facecolor='none', lw=3, label=label)
     ax.set_aspect('equal')
     ax.set_xlim(-1, 20)
     ax.set_ylim(-5, 10)
     ax.grid(True)
     ax.legend()
-    plt.title(title)
-    plt.show()
+    ax.set_title(title)
+    finish_figure(fig, path)
 
 if __name__ == "__main__":
     angle_deg = 30
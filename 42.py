@@ -1,6 +1,5 @@
 import math
-import matplotlib.pyplot as plt
-from matplotlib.patches import Polygon
+from render import new_figure, draw_polygons, finish_figure
 
 def rectangle_at(i):
     base_x = i * 1.2
@@ -18,22 +17,18 @@ def tr_rotate(poly, angle_rad):
     sin_a = math.sin(angle_rad)
     return tuple((x*cos_a - y*sin_a, x*sin_a + y*cos_a) for x,y in poly)
 
-def visualize(polygons_sequences, colors, labels, title):
-    plt.figure(figsize=(10,8))
-    ax = plt.gca()
+def visualize(polygons_sequences, colors, labels, title, path=None):
+    fig, ax = new_figure((10,8), path)
     for polys, color, label in zip(polygons_sequences, colors, labels):
-        for poly in polys:
-            patch = Polygon(poly, closed=True, edgecolor=color, facecolor='none', lw=2)
-            ax.add_patch(patch)
-        patch = Polygon(polys[0], closed=True, edgecolor=color, facecolor='none', lw=3, label=label)
-        ax.add_patch(patch)
+        draw_polygons(ax, polys, edgecolor=color, facecolor='none', lw=2)
+        draw_polygons(ax, polys[:1], edgecolor=color, facecolor='none', lw=3, label=label)
     ax.set_aspect('equal')
     ax.set_xlim(-10, 20)
     ax.set_ylim(-10, 20)
     ax.grid(True)
     ax.legend()
-    plt.title(title)
-    plt.show()
+    ax.set_title(title)
+    finish_figure(fig, path)
 
 if __name__ == "__main__":
     angle_rect_deg = 30
@@ -1,6 +1,11 @@
 import matplotlib.pyplot as plt
 import math
 import numpy as np
+from point_in_polygon import polygons_containing
+from halfplanes import any_vertex_inside
+from predicates import is_convex
+from corner_index import CornerIndex
+from polygon_batch import PolygonBatch
 
 def shift_polygon(polygon, dx=0, dy=0):
     return tuple((x+dx, y+dy) for x,y in polygon)
@@ -29,16 +34,6 @@ def plot_polygons_list(polygons_lists, titles):
 
 # --- вспомогательные функции ---
 
-def is_convex(polygon):
-    def cross(o, a, b):
-        return (a[0]-o[0])*(b[1]-o[1]) - (a[1]-o[1])*(b[0]-o[0])
-    signs = []
-    n = len(polygon)
-    for i in range(n):
-        c = cross(polygon[i], polygon[(i+1)%n], polygon[(i+2)%n])
-        signs.append(c > 0)
-    return all(signs) or not any(signs)
-
 def polygon_area(polygon):
     x = [p[0] for p in polygon]
     y = [p[1] for p in polygon]
@@ -47,17 +42,23 @@ def polygon_area(polygon):
 def polygon_sides(polygon):
     return [math.dist(polygon[i], polygon[(i+1)%len(polygon)]) for i in range(len(polygon))]
 
-def point_eq(p1, p2, eps=1e-9):
-    return abs(p1[0]-p2[0])<eps and abs(p1[1]-p2[1])<eps
-
 # Фильтры из п.5
 
 def flt_convex_polygon(polygons):
     return list(filter(is_convex, polygons))
 
-def flt_angle_point(polygons, point):
-    # Фильтрует фигуры с углом, совпадающим с point
-    return [p for p in polygons if any(point_eq(corner, point) for corner in p)]
+def flt_angle_point(polygons, point, eps=1e-9):
+    # Фильтрует фигуры с углом, совпадающим с point (с точностью eps по каждой оси);
+    # point может быть и списком точек — тогда угол должен совпасть хотя бы с одной.
+    # Для одной точки хватает векторного сравнения всех вершин, индекс окупается на многих
+    polygons = list(polygons)
+    if np.ndim(point) == 2:
+        mask = CornerIndex(polygons, eps).mask(point)
+    else:
+        batch = PolygonBatch.from_polygons(polygons)
+        near = (np.abs(batch.xs - point[0]) < eps) & (np.abs(batch.ys - point[1]) < eps)
+        mask = np.bincount(batch.polygon_ids()[near], minlength=len(batch)) > 0
+    return [p for p, keep in zip(polygons, mask) if keep]
 
 def flt_square(polygons, min_area=0.5):
     return [p for p in polygons if polygon_area(p) >= min_area]
@@ -68,30 +69,19 @@ def flt_short_side(polygons, min_length=0.3):
     return [p for p in polygons if not has_short_side(p)]
 
 def flt_point_inside(polygons, point):
-    # Проверка, лежит ли point внутри выпуклого многоугольника (используем метод с углами)
-    def inside(poly, pt):
-        def angle(a, b, c):
-            import math
-            def vector(p1, p2):
-                return (p2[0]-p1[0], p2[1]-p1[1])
-            import math
-            va = vector(pt, a)
-            vb = vector(pt, b)
-            dot = va[0]*vb[0]+va[1]*vb[1]
-            cross = va[0]*vb[1]-va[1]*vb[0]
-            return math.atan2(abs(cross), dot)
-        total = 0
-        n = len(poly)
-        for i in range(n):
-            total += angle(poly[i], poly[(i+1)%n], pt)
-        return abs(total - 2*math.pi) < 1e-3
-    return [p for p in polygons if is_convex(p) and inside(p, point)]
+    # Проверка, лежит ли point внутри многоугольника (правило чётности, подходит и для невыпуклых).
+    # Как в прежней проверке суммой углов: точка на стороне считается внутренней,
+    # а совпадающая с вершиной — нет
+    polygons = list(polygons)
+    point = tuple(point)
+    return [p for p, inside in zip(polygons, polygons_containing(point, polygons))
+            if inside and all(tuple(v) != point for v in p)]
 
 def flt_polygon_angles_inside(polygons, polygon):
-    # Фильтрует выпуклые полигоны, у которых хотя бы один угол внутри polygon
-    return [p for p in polygons if is_convex(p) and any(
-        flt_point_inside([p], angle)[0] if flt_point_inside([p], angle) else False
-        for angle in polygon)]
+    # Фильтрует выпуклые полигоны, у которых хотя бы один угол polygon лежит внутри.
+    # Как flt_point_inside: угол на стороне считается внутри, совпадающий с вершиной — нет
+    convex = [p for p in polygons if is_convex(p)]
+    return [p for p, inside in zip(convex, any_vertex_inside(polygon, convex, corners=False)) if inside]
 
 # --- Исходные полигоны для примера ---
 polygons = [
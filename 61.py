@@ -1,6 +1,6 @@
 import math
 import matplotlib.pyplot as plt
-from matplotlib.patches import Polygon
+from render import draw_polygons
 
 def extend_line_both_sides(angle_deg, length=50):
     rad = math.radians(angle_deg)
@@ -38,9 +38,7 @@ def trapezoids_between_lines(angle1_deg, angle2_deg, count=6, base_length=2.0, h
 
 # Функция для отрисовки трапеций на оси
 def draw_trapezoids(ax, trapezoids, color, alpha=0.7):
-    for poly in trapezoids:
-        patch = Polygon(poly, closed=True, facecolor=color, edgecolor='black', alpha=alpha)
-        ax.add_patch(patch)
+    draw_polygons(ax, trapezoids, edgecolor='black', facecolor=color, lw=1, alpha=alpha)
 
 # Генерация линий
 def plot_lines(ax):
@@ -1,6 +1,5 @@
 import math
-import matplotlib.pyplot as plt
-from matplotlib.patches import Polygon
+from render import new_figure, draw_polygons, cycle_colors, polygons_limits, finish_figure
 from itertools import islice, cycle
 
 
@@ -47,27 +46,22 @@ def shift_polygon(polygon, dx=0, dy=0):
     return tuple((x + dx, y + dy) for x, y in polygon)
 
 
-def plot_polygons(polygons, title):
-    fig, ax = plt.subplots(figsize=(14, 10))
+def plot_polygons(polygons, title, path=None):
+    fig, ax = new_figure(figsize=(14, 10), path=path)
     colors = ['red', 'green', 'blue', 'orange', 'purple']
 
-    all_x = [x for poly in polygons for (x, y) in poly]
-    all_y = [y for poly in polygons for (x, y) in poly]
     margin = 1
-    ax.set_xlim(min(all_x) - margin, max(all_x) + margin)
-    ax.set_ylim(min(all_y) - margin, max(all_y) + margin)
+    xmin, xmax, ymin, ymax = polygons_limits(polygons, margin)
+    ax.set_xlim(xmin, xmax)
+    ax.set_ylim(ymin, ymax)
 
-    for i, poly in enumerate(polygons):
-        poly_patch = Polygon(poly, closed=True, fill=True, alpha=0.6, color=colors[i % len(colors)], edgecolor='black')
-        ax.add_patch(poly_patch)
-        cx = sum(x for x, y in poly) / len(poly)
-        cy = sum(y for x, y in poly) / len(poly)
-        ax.text(cx, cy, str(i + 1), ha='center', va='center', fontsize=10, weight='bold')
+    draw_polygons(ax, polygons, edgecolor='black', facecolor=cycle_colors(colors, len(polygons)),
+                  lw=1, alpha=0.6, numbers=True)
 
     ax.set_title(title)
     ax.set_aspect('equal')
     ax.grid(True)
-    plt.show()
+    finish_figure(fig, path)
 
 
 # --- Основная логика ---
@@ -1,8 +1,14 @@
 import math
-import matplotlib.pyplot as plt
-from matplotlib.patches import Polygon
+from render import new_figure, draw_polygons, cycle_colors, polygons_limits, finish_figure
 from itertools import islice, cycle
+import numpy as np
+import shapely
 from shapely.geometry import Polygon as ShPolygon
+from convex_intersect import SCALAR_MAX_VERTICES, convex_intersect
+from overlap_graph import OverlapGraph
+from polygon_batch import PolygonBatch
+from predicates import is_simple_convex
+from sweep_intersect import candidate_pairs
 
 
 def gen_rectangle():
@@ -39,30 +45,30 @@ def tr_translate(polygon, dx=0, dy=0):
     return tuple((x + dx, y + dy) for x, y in polygon)
 
 
-def plot_polygons(polygons, title):
-    fig, ax = plt.subplots(figsize=(14, 8))
+def plot_polygons(polygons, title, path=None):
+    fig, ax = new_figure(figsize=(14, 8), path=path)
     colors = ['red', 'green', 'blue', 'orange', 'purple']
 
-    all_x = [x for poly in polygons for (x, y) in poly]
-    all_y = [y for poly in polygons for (x, y) in poly]
     margin = 2
-    ax.set_xlim(min(all_x) - margin, max(all_x) + margin)
-    ax.set_ylim(min(all_y) - margin, max(all_y) + margin)
+    xmin, xmax, ymin, ymax = polygons_limits(polygons, margin)
+    ax.set_xlim(xmin, xmax)
+    ax.set_ylim(ymin, ymax)
 
-    for i, poly in enumerate(polygons):
-        poly_patch = Polygon(poly, closed=True, fill=True, alpha=0.5, color=colors[i % len(colors)], edgecolor='black')
-        ax.add_patch(poly_patch)
-        cx = sum(x for x, y in poly) / len(poly)
-        cy = sum(y for x, y in poly) / len(poly)
-        ax.text(cx, cy, str(i + 1), ha='center', va='center', fontsize=10, weight='bold')
+    draw_polygons(ax, polygons, edgecolor='black', facecolor=cycle_colors(colors, len(polygons)),
+                  lw=1, alpha=0.5, numbers=True)
 
     ax.set_title(title)
     ax.set_aspect('equal')
     ax.grid(True)
-    plt.show()
+    finish_figure(fig, path)
 
 
 def polygons_intersect(p1, p2):
+    # небольшие простые выпуклые пары проверяем по разделяющей оси обычным циклом,
+    # shapely — для крупных и для остальных (невыпуклых, самопересекающихся, вырожденных)
+    if (len(p1) + len(p2) <= SCALAR_MAX_VERTICES
+            and is_simple_convex(p1) and is_simple_convex(p2)):
+        return convex_intersect(p1, p2)
     sp1 = ShPolygon(p1)
     sp2 = ShPolygon(p2)
     return sp1.intersects(sp2)
@@ -95,12 +101,42 @@ plot_polygons(polygons, "15 фигур с пересечениями")
 
 # Фильтрация пересекающихся фигур — оставляем только те, которые не пересекаются с предыдущими
 
+def shapely_polygons(batch):
+    # Все полигоны пачки одним вызовом shapely.from_ragged_array (кольца замыкаются первой вершиной)
+    n, counts = len(batch), batch.counts()
+    closed = np.cumsum(counts + 1) - 1
+    coords = np.empty((len(batch.xs) + n, 2))
+    is_vertex = np.ones(len(coords), dtype=bool)
+    is_vertex[closed] = False
+    coords[is_vertex, 0], coords[is_vertex, 1] = batch.xs, batch.ys
+    coords[closed, 0], coords[closed, 1] = batch.xs[batch.offsets[:-1]], batch.ys[batch.offsets[:-1]]
+    rings = batch.offsets + np.arange(n + 1)
+    return shapely.from_ragged_array(shapely.GeometryType.POLYGON, coords, (rings, np.arange(n + 1)))
+
+
+def find_intersecting_pairs(polygons):
+    # Все пары (i, j), i < j, пересекающихся фигур — то же, что polygons_intersect для каждой пары.
+    # Кандидаты с пересекающимися bbox находятся заметанием, фигуры shapely строятся
+    # одним вызовом, и все кандидаты проверяются пачками через векторный shapely.intersects
+    batch = PolygonBatch.from_polygons(polygons)
+    nonempty = np.flatnonzero(batch.counts() > 0)
+    shapes = shapely_polygons(batch.take(nonempty))
+    found_i, found_j = [], []
+    for i, j in candidate_pairs(batch.bboxes()[nonempty]):
+        hit = shapely.intersects(shapes[i], shapes[j])
+        found_i.append(nonempty[i[hit]])
+        found_j.append(nonempty[j[hit]])
+    if not found_i:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    return np.concatenate(found_i), np.concatenate(found_j)
+
+
 def filter_non_intersecting(polygons):
-    filtered = []
-    for poly in polygons:
-        if all(not polygons_intersect(poly, fp) for fp in filtered):
-            filtered.append(poly)
-    return filtered
+    # Жадно по порядку: фигура остаётся, если не пересекается ни с одной из уже оставленных
+    polygons = list(polygons)
+    i, j = find_intersecting_pairs(polygons)
+    kept = OverlapGraph(len(polygons), i, j).maximal_independent_set('input')
+    return [polygons[k] for k in kept.tolist()]
 
 
 filtered_polygons = filter_non_intersecting(polygons)
@@ -1,6 +1,15 @@
 import math
 from functools import wraps
+from itertools import islice, compress
 from collections.abc import Iterable
+import numpy as np
+from metrics_cache import metrics
+from pipeline import Pipeline, FILTER, TRANSFORM
+from profiling import profile_pipeline
+from polygon_batch import PolygonBatch
+from corner_index import CornerIndex
+from point_in_polygon import polygons_containing
+from halfplanes import any_vertex_inside
 
 # --- Вспомогательные функции ---
 
@@ -20,65 +29,93 @@ def polygon_sides(polygon):
         sides.append(math.dist((x1,y1),(x2,y2)))
     return sides
 
-def is_convex(polygon):
-    # Проверка выпуклости многоугольника
-    def cross(o, a, b):
-        return (a[0]-o[0])*(b[1]-o[1])-(a[1]-o[1])*(b[0]-o[0])
-    n = len(polygon)
-    signs = []
-    for i in range(n):
-        signs.append(cross(polygon[i], polygon[(i+1)%n], polygon[(i+2)%n]) > 0)
-    return all(signs) or not any(signs)
-
 def point_equals(p1, p2, eps=1e-9):
     return abs(p1[0]-p2[0]) < eps and abs(p1[1]-p2[1]) < eps
 
+def convex_mask(polygons):
+    if isinstance(polygons, PolygonBatch):
+        return polygons.is_convex()
+    return np.fromiter(map(metrics.is_convex, polygons), dtype=bool, count=len(polygons))
+
 # --- Фильтры ---
+# Помимо inner(polygons) фильтр может нести .predicate(polygon) и векторное
+# .batch(polygons) -> булева маска: ими пользуется конвейер из pipeline.py
 
 def flt_convex_polygon(polygons):
-    return filter(is_convex, polygons)
-
-def flt_angle_point(point):
+    return filter(metrics.is_convex, polygons)
+
+flt_convex_polygon.predicate = metrics.is_convex
+flt_convex_polygon.batch = convex_mask
+
+def flt_angle_point(point, eps=1e-9):
+    # point — одна точка или массив точек: угол должен совпасть хотя бы с одной.
+    # Для многих точек полигон сверяется с хеш-сеткой по точкам запроса, а пачка —
+    # с хеш-сеткой по своим вершинам, вместо перебора всех пар вершина — точка
+    if np.ndim(point) == 2:
+        queries = CornerIndex([point], eps)
+        predicate = queries.any_at
+        def batch(polygons):
+            return CornerIndex(polygons, eps).mask(point)
+    else:
+        def predicate(p):
+            return any(point_equals(v, point, eps) for v in p)
+        def batch(polygons):
+            near = (np.abs(polygons.xs - point[0]) < eps) & (np.abs(polygons.ys - point[1]) < eps)
+            return np.bincount(polygons.polygon_ids()[near], minlength=len(polygons)) > 0
     def inner(polygons):
-        return filter(lambda p: any(point_equals(v, point) for v in p), polygons)
+        return filter(predicate, polygons)
+    inner.predicate = predicate
+    inner.batch = batch
     return inner
 
 def flt_square(min_area):
+    def predicate(p):
+        return metrics.area(p) >= min_area
     def inner(polygons):
-        return filter(lambda p: polygon_area(p) >= min_area, polygons)
+        return filter(predicate, polygons)
+    inner.predicate = predicate
+    inner.batch = lambda polygons: polygons.areas() >= min_area
     return inner
 
 def flt_short_side(max_len):
+    def predicate(p):
+        return min(metrics.sides(p)) < max_len
     def inner(polygons):
-        return filter(lambda p: min(polygon_sides(p)) < max_len, polygons)
+        return filter(predicate, polygons)
+    inner.predicate = predicate
+    inner.batch = lambda polygons: polygons.min_sides() < max_len
     return inner
 
 def flt_point_inside(point):
-    # Для выпуклых: проверяем, что точка внутри многоугольника
-    def inside(polygon):
-        def sign(p1, p2, p3):
-            return (p1[0]-p3[0])*(p2[1]-p3[1])-(p2[0]-p3[0])*(p1[1]-p3[1])
-        n = len(polygon)
-        pos = neg = False
-        for i in range(n):
-            s = sign(point, polygon[i], polygon[(i+1)%n])
-            if s > 0:
-                pos = True
-            elif s < 0:
-                neg = True
-            if pos and neg:
-                return False
-        return True
+    # Точка внутри многоугольника (граница считается внутренней), в том числе невыпуклого.
+    # Полигоны проверяются пачками одним векторным вызовом
     def inner(polygons):
-        return filter(lambda p: is_convex(p) and inside(p), polygons)
+        it = iter(polygons)
+        while True:
+            chunk = list(islice(it, 4096))
+            if not chunk:
+                return
+            yield from compress(chunk, polygons_containing(point, chunk))
+    inner.batch = lambda polygons: polygons_containing(point, polygons)
     return inner
 
 def flt_polygon_angles_inside(reference_polygon):
+    # Выпуклые полигоны, внутри которых лежит хотя бы одна вершина reference_polygon.
+    # Пачка выпуклых полигонов проверяется через их полуплоскости одним матричным сравнением
+    def batch(polygons):
+        convex = np.flatnonzero(convex_mask(polygons))
+        mask = np.zeros(len(polygons), dtype=bool)
+        if len(convex):
+            mask[convex] = any_vertex_inside(reference_polygon, [polygons[i] for i in convex.tolist()])
+        return mask
     def inner(polygons):
-        ref_points = reference_polygon
-        def any_angle_inside(polygon):
-            return any(flt_point_inside(pt)([polygon]) for pt in ref_points)
-        return filter(lambda p: is_convex(p) and any_angle_inside(p), polygons)
+        it = iter(polygons)
+        while True:
+            chunk = list(islice(it, 4096))
+            if not chunk:
+                return
+            yield from compress(chunk, batch(chunk))
+    inner.batch = batch
     return inner
 
 # --- Трансформации ---
@@ -114,25 +151,42 @@ def tr_homothety(polygon, scale, center=(0,0)):
 
 # --- Декораторы ---
 
-def filter_polygons_in_args(filter_func):
+def polygon_stage_decorator(stage):
     def decorator(func):
+        # Стопка декораторов фильтрации и трансформации сворачивается в один конвейер:
+        # полигоны проходят все шаги за один проход, подряд идущие Affine складываются,
+        # порядок подряд идущих фильтров выбирает FilterPlanner.
+        # Сливаются только наши обёртки: functools.wraps копирует атрибуты, поэтому
+        # метка _stage_wrapper указывает на саму обёртку, а у чужой — нет
+        if getattr(func, '_stage_wrapper', None) is func:
+            stages = [stage] + func.pipeline.stages
+            func = func._stage_func
+        else:
+            stages = [stage]
+        pipeline = Pipeline(stages, name=func.__qualname__)
+        def apply(arg):
+            if isinstance(arg, Iterable) and not isinstance(arg, (str, bytes)):
+                return pipeline.run(arg)
+            return arg
         @wraps(func)
         def wrapper(*args, **kwargs):
-            new_args = [filter_func(arg) if isinstance(arg, Iterable) and not isinstance(arg, (str, bytes)) else arg for arg in args]
-            new_kwargs = {k: filter_func(v) if isinstance(v, Iterable) and not isinstance(v, (str, bytes)) else v for k,v in kwargs.items()}
+            new_args = [apply(arg) for arg in args]
+            new_kwargs = {k: apply(v) for k,v in kwargs.items()}
             return func(*new_args, **new_kwargs)
+        wrapper.pipeline = pipeline
+        wrapper.planner = pipeline.planner
+        wrapper.polygon_filters = [f for kind, f in stages if kind == FILTER]
+        wrapper._stage_wrapper = wrapper
+        wrapper._stage_func = func
         return wrapper
     return decorator
 
+def filter_polygons_in_args(filter_func):
+    return polygon_stage_decorator((FILTER, filter_func))
+
 def transform_polygons_in_args(transform_func):
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            new_args = [map(transform_func, arg) if isinstance(arg, Iterable) and not isinstance(arg, (str, bytes)) else arg for arg in args]
-            new_kwargs = {k: map(transform_func, v) if isinstance(v, Iterable) and not isinstance(v, (str, bytes)) else v for k,v in kwargs.items()}
-            return func(*new_args, **new_kwargs)
-        return wrapper
-    return decorator
+    # transform_func — функция от полигона или Affine (он тоже вызывается как функция)
+    return polygon_stage_decorator((TRANSFORM, transform_func))
 
 # --- Демонстрация ---
 
@@ -161,5 +215,18 @@ polygons = [square, small_square, triangle, concave]
 # --- Запуск ---
 
 print_filtered_polygons(polygons)
+print(print_filtered_polygons.planner.last_plan)
 print()
 print_translated_polygons(polygons)
+print()
+
+@filter_polygons_in_args(flt_convex_polygon)
+@filter_polygons_in_args(flt_square(1.5))
+@transform_polygons_in_args(lambda p: tr_translate(p, 10, 10))
+def count_polygons(polygons):
+    return sum(1 for _ in polygons)
+
+# Профиль по шагам включается только внутри with, в остальное время замеров нет
+with profile_pipeline() as profile:
+    count_polygons(polygons * 1000)
+print(profile)
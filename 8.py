@@ -1,5 +1,8 @@
 import math
 from functools import reduce
+from metrics_cache import metrics
+from profiling import profiled, profile_pipeline
+from vertex_index import VertexIndex
 
 def polygon_area(polygon):
     x = [pt[0] for pt in polygon]
@@ -13,27 +16,38 @@ def dist_to_origin(point):
     return math.sqrt(point[0]**2 + point[1]**2)
 
 
+@profiled()
 def agr_origin_nearest_reduce(polygons):
     '''Функция, выбирающая полигон с углом ближе к началу координат'''
     def reducer(poly1, poly2):
-        nearest1 = min(poly1, key=dist_to_origin)
-        nearest2 = min(poly2, key=dist_to_origin)
-        return poly1 if dist_to_origin(nearest1) < dist_to_origin(nearest2) else poly2
+        return poly1 if metrics.origin_distance(poly1) < metrics.origin_distance(poly2) else poly2
     return reduce(reducer, polygons)
 
+@profiled()
 def agr_max_side_reduce(polygons):
     '''Выбирает максимум длины стороны среди всех полигонов'''
     def reducer(max_side, polygon):
-        current_max = max(polygon_sides(polygon)) if polygon else 0
+        current_max = max(metrics.sides(polygon)) if polygon else 0
         return max(max_side, current_max)
     return reduce(reducer, polygons, 0)
 
+@profiled()
 def agr_min_area_reduce(polygons):
     '''Выбирает полигон с минимальной площадью'''
     def reducer(poly1, poly2):
-        return poly1 if polygon_area(poly1) < polygon_area(poly2) else poly2
+        return poly1 if metrics.area(poly1) < metrics.area(poly2) else poly2
     return reduce(reducer, polygons)
 
+@profiled()
+def agr_perimeter_sum_reduce(polygons):
+    '''Суммарный периметр всех полигонов (точная сумма, как SumPerimeter в aggregation.py)'''
+    return math.fsum(map(metrics.perimeter, polygons))
+
+@profiled()
+def agr_area_sum_reduce(polygons):
+    '''Суммарная площадь всех полигонов (точная сумма, как SumArea в aggregation.py)'''
+    return math.fsum(map(metrics.area, polygons))
+
 # проверка
 
 square = ((1,1),(1,3),(3,3),(3,1))
@@ -47,9 +61,23 @@ nearest_point = min(nearest_polygon, key=dist_to_origin)
 print("Полигоны с вершиной ближайшей к началу координат:", nearest_polygon)
 print("Самая близкая вершина:", nearest_point)
 
+# Индекс строится один раз и отвечает на запросы для любых точек, а не только для (0, 0)
+index = VertexIndex(polygons)
+ids, distances = index.nearest_polygons([(0, 0), (3, 3)], k=2)
+print("Два ближайших полигона к (0, 0) и к (3, 3):", ids.tolist(), distances.tolist())
+print("Полигоны с вершиной в радиусе 1.5 от (1, 2):", index.within((1, 2), 1.5).tolist())
+
 max_side_length = agr_max_side_reduce(polygons)
 print("Максимальная длина стороны среди всех полигонов:", max_side_length)
 
 min_area_polygon = agr_min_area_reduce(polygons)
 print("Полигон с минимальной площадью:", min_area_polygon)
 print("Площадь этого полигона:", polygon_area(min_area_polygon))
+
+print("Суммарный периметр:", agr_perimeter_sum_reduce(polygons))
+print("Суммарная площадь:", agr_area_sum_reduce(polygons))
+
+with profile_pipeline() as profile:
+    agr_max_side_reduce(polygons)
+    agr_area_sum_reduce(iter(polygons))
+print(profile)
@@ -0,0 +1,146 @@
+import math
+from itertools import islice
+
+import numpy as np
+
+from polygon_batch import PolygonBatch
+
+
+class Affine:
+    '''Аффинное преобразование плоскости в виде матрицы 3x3 (однородные координаты).
+
+    Методы translate/rotate/symmetry/homothety возвращают новое преобразование:
+    сначала текущее, затем добавленное. Углы в радианах, как в tr_rotate из 3.py и 4.py.
+    '''
+
+    __slots__ = ("matrix",)
+
+    def __init__(self, matrix=None):
+        self.matrix = np.identity(3) if matrix is None else np.asarray(matrix, dtype=np.float64)
+
+    @classmethod
+    def translation(cls, dx, dy):
+        return cls([[1, 0, dx], [0, 1, dy], [0, 0, 1]])
+
+    @classmethod
+    def rotation(cls, angle_rad, center=(0, 0)):
+        cos_a = math.cos(angle_rad)
+        sin_a = math.sin(angle_rad)
+        cx, cy = center
+        # поворот вокруг center: x' = R(x - c) + c
+        return cls([
+            [cos_a, -sin_a, cx - cos_a * cx + sin_a * cy],
+            [sin_a, cos_a, cy - sin_a * cx - cos_a * cy],
+            [0, 0, 1],
+        ])
+
+    @classmethod
+    def symmetry_axis(cls, axis='x'):
+        if axis == 'x':
+            return cls([[1, 0, 0], [0, -1, 0], [0, 0, 1]])
+        elif axis == 'y':
+            return cls([[-1, 0, 0], [0, 1, 0], [0, 0, 1]])
+        else:
+            raise ValueError("axis must be 'x' or 'y'")
+
+    @classmethod
+    def scaling(cls, k, center=(0, 0)):
+        cx, cy = center
+        return cls([[k, 0, cx - k * cx], [0, k, cy - k * cy], [0, 0, 1]])
+
+    def then(self, other):
+        return Affine(other.matrix @ self.matrix)
+
+    def translate(self, dx, dy):
+        return self.then(Affine.translation(dx, dy))
+
+    def rotate(self, angle_rad, center=(0, 0)):
+        return self.then(Affine.rotation(angle_rad, center))
+
+    def symmetry(self, axis='x'):
+        return self.then(Affine.symmetry_axis(axis))
+
+    def homothety(self, k, center=(0, 0)):
+        return self.then(Affine.scaling(k, center))
+
+    def apply_xy(self, xs, ys):
+        (a, b, c), (d, e, f) = self.matrix[:2]
+        return a * xs + b * ys + c, d * xs + e * ys + f
+
+    def apply_batch(self, batch):
+        xs, ys = self.apply_xy(batch.xs, batch.ys)
+        return PolygonBatch(xs, ys, batch.offsets)
+
+    def apply(self, polygons):
+        # Список полигонов-кортежей, преобразованных за один векторный проход
+        if not isinstance(polygons, PolygonBatch):
+            polygons = PolygonBatch.from_polygons(polygons)
+        return self.apply_batch(polygons).to_polygons()
+
+    def __call__(self, polygon):
+        # Преобразование одного полигона, чтобы Affine можно было передавать в map
+        (a, b, c), (d, e, f) = self.matrix[:2].tolist()
+        return tuple((a * x + b * y + c, d * x + e * y + f) for x, y in polygon)
+
+    def __repr__(self):
+        return f"Affine({self.matrix[:2].tolist()})"
+
+
+class TransformChain:
+    '''Ленивая цепочка tr_* преобразований над последовательностью полигонов.
+
+    Шаги только накапливаются в одной матрице; координаты пересчитываются
+    один раз при чтении результата, пачками по chunk_size полигонов.
+    Источник может быть бесконечным генератором.
+    '''
+
+    def __init__(self, polygons, transform=None, chunk_size=4096):
+        self.polygons = polygons
+        self.transform = transform or Affine()
+        self.chunk_size = chunk_size
+
+    def _with(self, transform):
+        return TransformChain(self.polygons, transform, self.chunk_size)
+
+    def translate(self, dx, dy):
+        return self._with(self.transform.translate(dx, dy))
+
+    def rotate(self, angle_rad, center=(0, 0)):
+        return self._with(self.transform.rotate(angle_rad, center))
+
+    def symmetry(self, axis='x'):
+        return self._with(self.transform.symmetry(axis))
+
+    def homothety(self, k, center=(0, 0)):
+        return self._with(self.transform.homothety(k, center))
+
+    def batches(self):
+        if isinstance(self.polygons, PolygonBatch):
+            yield self.transform.apply_batch(self.polygons)
+            return
+        it = iter(self.polygons)
+        while True:
+            chunk = list(islice(it, self.chunk_size))
+            if not chunk:
+                return
+            yield self.transform.apply_batch(PolygonBatch.from_polygons(chunk))
+
+    def batch(self):
+        return PolygonBatch.concatenate(self.batches())
+
+    def __iter__(self):
+        for batch in self.batches():
+            yield from batch
+
+
+if __name__ == "__main__":
+    squares = [((x, 0), (x + 1, 0), (x + 1, 1), (x, 1)) for x in range(0, 10, 2)]
+
+    chain = (TransformChain(squares)
+             .translate(1, 1)
+             .rotate(math.pi / 2)
+             .symmetry('y')
+             .homothety(0.5, center=(1, 1)))
+    print("Итоговая матрица:", chain.transform)
+    for poly in chain:
+        print(poly)
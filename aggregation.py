@@ -0,0 +1,297 @@
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+from itertools import islice
+
+from metrics_cache import metrics
+from polygon_batch import PolygonBatch
+from polygon_file import PolygonDataset
+from profiling import profiled
+
+
+class PolygonMetrics:
+    '''Характеристики одного полигона, которые считаются не больше одного раза за шаг.
+
+    Формулы — из общего кэша metrics_cache.metrics, как у flt_* и agr_*.
+    '''
+
+    def __init__(self, polygon):
+        self.polygon = polygon
+
+    @cached_property
+    def area(self):
+        return metrics.area(self.polygon)
+
+    @cached_property
+    def sides(self):
+        return metrics.sides(self.polygon)
+
+    @cached_property
+    def perimeter(self):
+        return metrics.perimeter(self.polygon)
+
+    @cached_property
+    def origin_distance(self):
+        return metrics.origin_distance(self.polygon)
+
+
+def _add_exact(partials, x):
+    # Точная сумма в виде неперекрывающихся частичных сумм (алгоритм Шевчука, как в math.fsum)
+    i = 0
+    for y in partials:
+        if abs(x) < abs(y):
+            x, y = y, x
+        hi = x + y
+        lo = y - (hi - x)
+        if lo:
+            partials[i] = lo
+            i += 1
+        x = hi
+    partials[i:] = [x]
+    return partials
+
+
+class Aggregator:
+    '''Потоковый агрегатор: initial() -> step(state, metrics)* -> result(state).
+
+    combine(left, right) объединяет состояния двух соседних частей входа
+    (left идёт раньше right) так, что результат совпадает с последовательным проходом.
+    '''
+
+    name = None
+
+    def initial(self):
+        raise NotImplementedError
+
+    def step(self, state, m):
+        raise NotImplementedError
+
+    def combine(self, left, right):
+        raise NotImplementedError
+
+    def result(self, state):
+        return state
+
+
+def _combine_later_wins(left, right):
+    # состояние (полигон, значение): меньшее значение, при равенстве — из правой части
+    if left is None:
+        return right
+    if right is None or left[1] < right[1]:
+        return left
+    return right
+
+
+class OriginNearest(Aggregator):
+    '''Полигон с вершиной, ближайшей к началу координат (как agr_origin_nearest_reduce)'''
+
+    name = 'origin_nearest'
+
+    def initial(self):
+        return None
+
+    def step(self, state, m):
+        # при равенстве побеждает более поздний полигон, как в reduce из 8.py
+        d = m.origin_distance
+        if state is None or not state[1] < d:
+            return (m.polygon, d)
+        return state
+
+    def combine(self, left, right):
+        return _combine_later_wins(left, right)
+
+    def result(self, state):
+        return None if state is None else state[0]
+
+
+class MaxSide(Aggregator):
+    '''Максимальная длина стороны (как agr_max_side_reduce)'''
+
+    name = 'max_side'
+
+    def initial(self):
+        return 0
+
+    def step(self, state, m):
+        return max(state, max(m.sides) if m.polygon else 0)
+
+    def combine(self, left, right):
+        return max(left, right)
+
+
+class MinArea(Aggregator):
+    '''Полигон с минимальной площадью (как agr_min_area_reduce)'''
+
+    name = 'min_area'
+
+    def initial(self):
+        return None
+
+    def step(self, state, m):
+        a = m.area
+        if state is None or not state[1] < a:
+            return (m.polygon, a)
+        return state
+
+    def combine(self, left, right):
+        return _combine_later_wins(left, right)
+
+    def result(self, state):
+        return None if state is None else state[0]
+
+
+class SumArea(Aggregator):
+    '''Суммарная площадь'''
+
+    name = 'sum_area'
+
+    def initial(self):
+        return []
+
+    def step(self, state, m):
+        return _add_exact(state, m.area)
+
+    def combine(self, left, right):
+        for x in right:
+            _add_exact(left, x)
+        return left
+
+    def result(self, state):
+        return math.fsum(state)
+
+
+class SumPerimeter(Aggregator):
+    '''Суммарный периметр'''
+
+    name = 'sum_perimeter'
+
+    def initial(self):
+        return []
+
+    def step(self, state, m):
+        return _add_exact(state, m.perimeter)
+
+    def combine(self, left, right):
+        for x in right:
+            _add_exact(left, x)
+        return left
+
+    def result(self, state):
+        return math.fsum(state)
+
+
+AGGREGATORS = {cls.name: cls for cls in (OriginNearest, MaxSide, MinArea, SumArea, SumPerimeter)}
+
+
+def _resolve(aggregators):
+    return [AGGREGATORS[a]() if isinstance(a, str) else a for a in aggregators]
+
+
+def aggregate_states(polygons, aggregators):
+    states = [a.initial() for a in aggregators]
+    for polygon in polygons:
+        m = PolygonMetrics(polygon)
+        states = [a.step(s, m) for a, s in zip(aggregators, states)]
+    return states
+
+
+@profiled()
+def aggregate(polygons, aggregators=tuple(AGGREGATORS)):
+    '''Считает все агрегаты за один проход по polygons.
+
+    polygons может быть генератором (в том числе срезом бесконечного),
+    список не строится. aggregators — экземпляры Aggregator или их имена.
+    Возвращает словарь {имя: результат}.
+    '''
+    aggregators = _resolve(aggregators)
+    states = aggregate_states(polygons, aggregators)
+    return {a.name: a.result(s) for a, s in zip(aggregators, states)}
+
+
+def _parts(polygons, chunk_size):
+    # Части входа для процессов: PolygonDataset уходит как (набор, начало, конец) —
+    # pickle передаёт только путь, процесс сам отображает файл; остальное —
+    # PolygonBatch, т.е. три плоских массива вместо кортежей кортежей
+    if hasattr(polygons, 'to_batch'):
+        polygons = polygons.to_batch()
+    if isinstance(polygons, PolygonDataset):
+        for lo in range(0, len(polygons), chunk_size):
+            yield (polygons, lo, lo + chunk_size)
+        return
+    if isinstance(polygons, PolygonBatch):
+        for lo in range(0, len(polygons), chunk_size):
+            yield polygons[lo:lo + chunk_size]
+        return
+    it = iter(polygons)
+    while True:
+        batch = PolygonBatch.from_polygons(islice(it, chunk_size))
+        if not len(batch):
+            return
+        yield batch
+
+
+def _aggregate_part(part, aggregators):
+    if isinstance(part, tuple):
+        dataset, lo, hi = part
+        part = dataset[lo:hi]
+    return aggregate_states(part, aggregators)
+
+
+@profiled()
+def parallel_aggregate(polygons, aggregators=tuple(AGGREGATORS), workers=None, chunk_size=50_000):
+    '''То же, что aggregate, но части входа по chunk_size полигонов считаются в пуле процессов.
+
+    Части передаются процессам как PolygonBatch (плоские массивы координат и
+    смещений), PolygonDataset — по пути к файлу. Полигоны в результате
+    (origin_nearest, min_area) — кортежи кортежей float с теми же координатами.
+    Частичные состояния объединяются через combine строго в порядке входа,
+    поэтому результат (включая выбор при равенстве) совпадает с aggregate.
+    В работе одновременно не больше 2 * workers частей, так что вход может быть генератором.
+    '''
+    aggregators = _resolve(aggregators)
+    workers = workers or os.cpu_count() or 1
+    parts = _parts(polygons, chunk_size)
+    states = [a.initial() for a in aggregators]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        while True:
+            while len(pending) < 2 * workers:
+                part = next(parts, None)
+                if part is None:
+                    break
+                pending.append(pool.submit(_aggregate_part, part, aggregators))
+            if not pending:
+                break
+            part = pending.popleft().result()
+            states = [a.combine(s, p) for a, s, p in zip(aggregators, states, part)]
+    return {a.name: a.result(s) for a, s in zip(aggregators, states)}
+
+
+if __name__ == "__main__":
+    import time
+
+    def gen_rectangle():
+        i = 0
+        while True:
+            yield ((i*1.2 - 5, 0), (i*1.2 - 4, 0), (i*1.2 - 4, 1 + i % 3), (i*1.2 - 5, 1 + i % 3))
+            i += 1
+
+    n = 400_000
+    start = time.perf_counter()
+    serial = aggregate(islice(gen_rectangle(), n))
+    base = time.perf_counter() - start
+    for name, value in serial.items():
+        print(f"{name}: {value}")
+    print(f"последовательно: {base:.2f} с")
+
+    batch = PolygonBatch.from_polygons(islice(gen_rectangle(), n))
+    print(f"ядер: {os.cpu_count()}")
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        for label, polygons in (("генератор", lambda: islice(gen_rectangle(), n)), ("PolygonBatch", lambda: batch)):
+            start = time.perf_counter()
+            result = parallel_aggregate(polygons(), workers=workers)
+            elapsed = time.perf_counter() - start
+            assert result == serial
+            print(f"процессов: {workers}, вход: {label}, время: {elapsed:.2f} с, ускорение: {base / elapsed:.2f}x")
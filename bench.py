@@ -0,0 +1,258 @@
+'''Замеры производительности всех flt_*, tr_*, agr_*, polygons_intersect и filter_non_intersecting.
+
+Запуск:
+    python bench.py                                   # размеры 1e3..1e5, пишет bench_output.json
+    python bench.py --sizes 1e3,1e5,1e7 --vertices 3,6,1000 --max-vertices 1e9   # полный прогон
+    python bench.py --only 7.flt_ --repeat 5
+    python bench.py --compare old.json                # замер и сравнение с прошлым результатом
+    python bench.py --compare old.json --current new.json   # сравнение двух файлов без замера
+
+Наборы данных — ленты фигур из shape_ribbon (те же, что у генераторов zadanie2.py,
+для других чисел вершин — правильные многоугольники), свёрнутые в сетку так, что
+соседние ряды перекрываются. Наборы, где полигонов × вершин больше --max-vertices,
+пропускаются. В режиме сравнения код возврата 1, если хоть один замер медленнее
+базового больше чем на --threshold.
+'''
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from collections import deque
+from collections.abc import Iterator
+
+import numpy as np
+from shapely import STRtree
+from shapely.geometry import Polygon as ShPolygon
+
+from metrics_cache import metrics
+from shape_ribbon import ShapeRibbon, hexagon_ribbon, rectangle_ribbon, triangle_ribbon
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = ('3', '4', '42', '43', '5', '62', '63', '7', '8')
+
+
+def load_script(name):
+    # Скрипты с номерами нельзя импортировать обычным образом; их демонстрации
+    # выполняются при загрузке, поэтому графики уходят в Agg, а вывод — в никуда
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    spec = importlib.util.spec_from_file_location(f'script_{name}', os.path.join(HERE, f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(module)
+    return module
+
+
+def regular_ribbon(vertices, radius=0.5, gap=0.3):
+    angles = 2 * math.pi * np.arange(vertices) / vertices
+    template = np.column_stack([radius * np.cos(angles), radius * np.sin(angles)])
+    return ShapeRibbon(template, (2 * radius + gap, 0))
+
+
+RIBBONS = {3: triangle_ribbon, 4: rectangle_ribbon, 6: hexagon_ribbon}
+
+
+def dataset(n, vertices):
+    '''n полигонов с vertices вершинами: лента, свёрнутая в квадратную сетку с перекрытием рядов.'''
+    ribbon = RIBBONS[vertices]() if vertices in RIBBONS else regular_ribbon(vertices)
+    cols = max(1, math.isqrt(n))
+    index = np.arange(n)
+    coords = ribbon.coords(index % cols)
+    height = np.ptp(ribbon.template[:, 1])
+    # шаг рядов меньше высоты фигуры — соседние ряды пересекаются
+    coords[:, :, 1] += (index // cols * 0.8 * height)[:, None]
+    return [tuple(map(tuple, p)) for p in coords.tolist()]
+
+
+def consume(result):
+    # Ленивые результаты (map, filter, генераторы) нужно прогнать до конца
+    if isinstance(result, Iterator):
+        deque(result, maxlen=0)
+
+
+def probes(polygons):
+    # Параметры фильтров, зависящие от данных: вершина, центр и увеличенная копия среднего полигона
+    middle = polygons[len(polygons) // 2]
+    cx = sum(x for x, _ in middle) / len(middle)
+    cy = sum(y for _, y in middle) / len(middle)
+    reference = tuple((cx + 2 * (x - cx), cy + 2 * (y - cy)) for x, y in middle)
+    return middle[0], (cx, cy), reference
+
+
+def corners(polygons, count=1000):
+    # Первые вершины полигонов, взятых с равным шагом: запросы для flt_angle_point по многим точкам
+    step = max(1, len(polygons) // count)
+    return [p[0] for p in polygons[::step] if len(p)]
+
+
+def shapely_filter_non_intersecting(polygons):
+    # Жадный фильтр из 63.py только на shapely: дерево STRtree по всем фигурам, проверка — intersects
+    shapes = [ShPolygon(p) for p in polygons]
+    tree = STRtree(shapes)
+    taken = np.zeros(len(shapes), dtype=bool)
+    for k, shape in enumerate(shapes):
+        near = tree.query(shape, predicate='intersects')
+        if not taken[near[near < k]].any():
+            taken[k] = True
+    return [p for p, t in zip(polygons, taken) if t]
+
+
+def cases(scripts):
+    '''Список (имя, функция от списка полигонов). Имя — «скрипт.функция».'''
+    s3, s4, s42, s43, s5, s62, s63, s7, s8 = (scripts[name] for name in SCRIPTS)
+    angle = math.pi / 6
+    return [
+        ('3.tr_translate', lambda ps: s3.tr_translate(ps, 1, 2)),
+        ('3.tr_rotate', lambda ps: s3.tr_rotate(ps, angle)),
+        ('3.tr_symmetry', lambda ps: s3.tr_symmetry(ps, 'y')),
+        ('3.tr_homothety', lambda ps: s3.tr_homothety(ps, 1.5)),
+        ('4.tr_translate', lambda ps: s4.tr_translate(ps, 1, 2)),
+        ('4.tr_rotate', lambda ps: s4.tr_rotate(ps, angle)),
+        ('42.tr_translate', lambda ps: [s42.tr_translate(p, 1, 2) for p in ps]),
+        ('42.tr_rotate', lambda ps: [s42.tr_rotate(p, angle) for p in ps]),
+        ('43.tr_translate', lambda ps: [s43.tr_translate(p, 1, 2) for p in ps]),
+        ('43.tr_symmetry', lambda ps: [s43.tr_symmetry(p) for p in ps]),
+        ('5.flt_convex_polygon', lambda ps: s5.flt_convex_polygon(ps)),
+        ('5.flt_angle_point', lambda ps: s5.flt_angle_point(ps, probes(ps)[0])),
+        ('5.flt_angle_point_many', lambda ps: s5.flt_angle_point(ps, corners(ps))),
+        ('5.flt_square', lambda ps: s5.flt_square(ps, 0.5)),
+        ('5.flt_short_side', lambda ps: s5.flt_short_side(ps, 0.3)),
+        ('5.flt_point_inside', lambda ps: s5.flt_point_inside(ps, probes(ps)[1])),
+        ('5.flt_polygon_angles_inside', lambda ps: s5.flt_polygon_angles_inside(ps, probes(ps)[2])),
+        ('62.tr_homothety', lambda ps: [s62.tr_homothety(p, 1.5) for p in ps]),
+        ('62.flt_short_side', lambda ps: [p for p in ps if s62.flt_short_side(p, 0.3)]),
+        ('63.tr_homothety', lambda ps: [s63.tr_homothety(p, 1.5) for p in ps]),
+        ('63.tr_translate', lambda ps: [s63.tr_translate(p, 1, 2) for p in ps]),
+        ('63.polygons_intersect', lambda ps: [s63.polygons_intersect(a, b) for a, b in zip(ps, ps[1:])]),
+        ('63.filter_non_intersecting', lambda ps: s63.filter_non_intersecting(ps)),
+        # для сравнения — те же проверки целиком через shapely
+        ('shapely.polygons_intersect', lambda ps: [ShPolygon(a).intersects(ShPolygon(b)) for a, b in zip(ps, ps[1:])]),
+        ('shapely.filter_non_intersecting', shapely_filter_non_intersecting),
+        ('7.flt_convex_polygon', lambda ps: s7.flt_convex_polygon(ps)),
+        ('7.flt_angle_point', lambda ps: s7.flt_angle_point(probes(ps)[0])(ps)),
+        ('7.flt_angle_point_many', lambda ps: s7.flt_angle_point(corners(ps))(ps)),
+        ('7.flt_square', lambda ps: s7.flt_square(0.5)(ps)),
+        ('7.flt_short_side', lambda ps: s7.flt_short_side(0.3)(ps)),
+        ('7.flt_point_inside', lambda ps: s7.flt_point_inside(probes(ps)[1])(ps)),
+        ('7.flt_polygon_angles_inside', lambda ps: s7.flt_polygon_angles_inside(probes(ps)[2])(ps)),
+        ('7.tr_translate', lambda ps: [s7.tr_translate(p, 1, 2) for p in ps]),
+        ('7.tr_rotate', lambda ps: [s7.tr_rotate(p, 30) for p in ps]),
+        ('7.tr_symmetry', lambda ps: [s7.tr_symmetry(p, 'x') for p in ps]),
+        ('7.tr_homothety', lambda ps: [s7.tr_homothety(p, 1.5) for p in ps]),
+        ('8.agr_origin_nearest_reduce', lambda ps: s8.agr_origin_nearest_reduce(ps)),
+        ('8.agr_max_side_reduce', lambda ps: s8.agr_max_side_reduce(ps)),
+        ('8.agr_min_area_reduce', lambda ps: s8.agr_min_area_reduce(ps)),
+        ('8.agr_perimeter_sum_reduce', lambda ps: s8.agr_perimeter_sum_reduce(ps)),
+        ('8.agr_area_sum_reduce', lambda ps: s8.agr_area_sum_reduce(ps)),
+    ]
+
+
+def measure(func, polygons, repeat):
+    times = []
+    for _ in range(repeat):
+        # кеш метрик между повторами сбрасываем, иначе второй прогон почти бесплатный
+        metrics.clear()
+        start = time.perf_counter()
+        consume(func(polygons))
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run(sizes, vertex_counts, repeat, only=None, max_vertices=1e6, log=sys.stderr):
+    scripts = {name: load_script(name) for name in SCRIPTS}
+    selected = [(name, func) for name, func in cases(scripts) if not only or any(o in name for o in only)]
+    results = []
+    for vertices in vertex_counts:
+        for n in sizes:
+            if n * vertices > max_vertices:
+                print(f"пропуск: {n} x {vertices} вершин больше --max-vertices", file=log)
+                continue
+            polygons = dataset(n, vertices)
+            for name, func in selected:
+                times = measure(func, polygons, repeat)
+                best = min(times)
+                results.append({'name': name, 'n': n, 'vertices': vertices, 'best': best,
+                                'median': statistics.median(times), 'per_polygon': best / n})
+                print(f"{name:32} n={n:<9} m={vertices:<5} {best * 1e3:10.2f} мс  "
+                      f"{best / n * 1e6:8.3f} мкс/полигон", file=log)
+            del polygons
+    return {'meta': meta(sizes, vertex_counts, repeat), 'results': results}
+
+
+def meta(sizes, vertex_counts, repeat):
+    return {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'machine': platform.machine(), 'platform': platform.platform(),
+            'sizes': sizes, 'vertices': vertex_counts, 'repeat': repeat}
+
+
+def compare(baseline, current, threshold=0.25):
+    '''Строки сравнения (имя, n, вершины, было, стало, отношение) и список регрессий.'''
+    key = lambda r: (r['name'], r['n'], r['vertices'])
+    before = {key(r): r for r in baseline['results']}
+    rows, regressions = [], []
+    for r in current['results']:
+        old = before.get(key(r))
+        if old is None:
+            continue
+        ratio = r['best'] / old['best'] if old['best'] > 0 else math.inf
+        row = (r['name'], r['n'], r['vertices'], old['best'], r['best'], ratio)
+        rows.append(row)
+        if ratio > 1 + threshold:
+            regressions.append(row)
+    return rows, regressions
+
+
+def print_comparison(rows, regressions, threshold, out=sys.stdout):
+    print(f"{'функция':32} {'n':>9} {'m':>5} {'было, мс':>12} {'стало, мс':>12} {'отношение':>10}", file=out)
+    for name, n, vertices, old, new, ratio in rows:
+        mark = '  <-- медленнее' if ratio > 1 + threshold else ''
+        print(f"{name:32} {n:>9} {vertices:>5} {old * 1e3:12.2f} {new * 1e3:12.2f} {ratio:10.2f}{mark}", file=out)
+    print(f"Сравнено замеров: {len(rows)}, медленнее чем на {threshold:.0%}: {len(regressions)}", file=out)
+
+
+def parse_counts(text):
+    return [int(float(v)) for v in text.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=parse_counts, default=[1000, 10_000, 100_000],
+                        help='число полигонов через запятую, например 1e3,1e5,1e7')
+    parser.add_argument('--vertices', type=parse_counts, default=[3, 4, 6, 32, 100],
+                        help='число вершин через запятую (от 3 до 1000)')
+    parser.add_argument('--max-vertices', type=float, default=1e6,
+                        help='пропускать наборы, где полигонов x вершин больше этого')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', action='append', help='замерять только функции, в имени которых есть подстрока')
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON прошлого замера для сравнения')
+    parser.add_argument('--current', help='вместо нового замера сравнить с этим JSON')
+    parser.add_argument('--threshold', type=float, default=0.25, help='допустимое замедление, доля')
+    args = parser.parse_args(argv)
+
+    if args.current:
+        with open(args.current, encoding='utf-8') as f:
+            current = json.load(f)
+    else:
+        current = run(args.sizes, args.vertices, args.repeat, args.only, args.max_vertices)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=1)
+        print(f"Результаты записаны в {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows, regressions = compare(baseline, current, args.threshold)
+        print_comparison(rows, regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import numpy as np
+
+from polygon_batch import PolygonBatch
+
+# До такого числа вершин у пары (в сумме) обычный цикл быстрее NumPy и shapely
+SCALAR_MAX_VERTICES = 12
+
+
+def edge_normals(coords):
+    # Нормали к сторонам: для стороны (dx, dy) берём (-dy, dx); работает для формы (..., m, 2)
+    edges = np.concatenate([coords[..., 1:, :], coords[..., :1, :]], axis=-2) - coords
+    return edges[..., ::-1] * (-1.0, 1.0)
+
+
+def _separated_on_edges(poly, a, b):
+    # Есть ли среди нормалей к сторонам poly ось, на которой проекции a и b не перекрываются
+    x1, y1 = poly[-1]
+    for x2, y2 in poly:
+        nx, ny = y1 - y2, x2 - x1
+        pa = [nx*x + ny*y for x, y in a]
+        pb = [nx*x + ny*y for x, y in b]
+        if max(pa) < min(pb) or max(pb) < min(pa):
+            return True
+        x1, y1 = x2, y2
+    return False
+
+
+def convex_intersect(p1, p2):
+    '''Пересечение двух выпуклых полигонов по теореме о разделяющей оси.
+
+    Касание считается пересечением, как в shapely intersects. Оба полигона
+    должны быть простыми выпуклыми (predicates.is_simple_convex). Небольшие
+    пары проверяются обычным циклом, крупные — проекциями на NumPy. Для
+    многих пар с одним полигоном — convex_intersect_many.
+    '''
+    if len(p1) + len(p2) <= SCALAR_MAX_VERTICES:
+        return not (_separated_on_edges(p1, p1, p2) or _separated_on_edges(p2, p1, p2))
+    a = np.asarray(p1, dtype=np.float64)
+    b = np.asarray(p2, dtype=np.float64)
+    axes = np.concatenate([edge_normals(a), edge_normals(b)]).T
+    pa, pb = a @ axes, b @ axes
+    return not ((pa.max(axis=0) < pb.min(axis=0)) | (pb.max(axis=0) < pa.min(axis=0))).any()
+
+
+def _groups(polygons):
+    # Полигоны с одинаковым числом вершин: (номера, массив (g, m, 2)) по каждому m
+    if not isinstance(polygons, PolygonBatch):
+        by_size = {}
+        for i, p in enumerate(polygons):
+            if len(p):
+                by_size.setdefault(len(p), []).append(i)
+        for ids in by_size.values():
+            yield np.array(ids), np.array([polygons[i] for i in ids], dtype=np.float64)
+        return
+    counts = polygons.counts()
+    for m in np.unique(counts):
+        if m == 0:
+            continue
+        ids = np.flatnonzero(counts == m)
+        idx = polygons.offsets[ids][:, None] + np.arange(m)
+        yield ids, np.stack([polygons.xs[idx], polygons.ys[idx]], axis=-1)
+
+
+def convex_intersect_many(polygon, polygons):
+    '''Проверяет один выпуклый полигон против набора выпуклых полигонов (все — простые выпуклые).
+
+    polygons — PolygonBatch или список полигонов; результат — булев массив.
+    Полигоны группируются по числу вершин, каждая группа проверяется одним
+    векторным проходом.
+    '''
+    a = np.asarray(polygon, dtype=np.float64)
+    axes_a = edge_normals(a)
+    result = np.zeros(len(polygons), dtype=bool)
+    for ids, b in _groups(polygons):
+        axes_b = edge_normals(b)                                           # (g, m, 2)
+        # оси полигона a: проекции a считаются один раз на всю группу
+        pa = a @ axes_a.T                                                  # (k, ka)
+        pb = b @ axes_a.T                                                  # (g, m, ka)
+        sep = ((pa.max(axis=0) < pb.min(axis=1)) | (pb.max(axis=1) < pa.min(axis=0))).any(axis=1)
+        # оси полигонов группы
+        qa = np.einsum('kc,gec->gke', a, axes_b)                           # (g, k, m)
+        qb = np.einsum('gvc,gec->gve', b, axes_b)                          # (g, m, m)
+        sep |= ((qa.max(axis=1) < qb.min(axis=1)) | (qb.max(axis=1) < qa.min(axis=1))).any(axis=1)
+        result[ids] = ~sep
+    return result
@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+
+from polygon_batch import PolygonBatch
+
+
+class CornerIndex:
+    '''Хеш-сетка по вершинам: у каких полигонов есть угол в точке P.
+
+    Совпадение — как point_equals из 7.py: abs(dx) < eps и abs(dy) < eps.
+    Вершины раскладываются по ячейкам со стороной 2 * eps (ключ — пара
+    floor(x / cell), floor(y / cell)), так что совпадающая с запросом вершина
+    всегда лежит в его ячейке или в одной из восьми соседних, даже с учётом
+    округления при делении. Кандидаты из этих девяти ячеек затем проверяются
+    точным условием, поэтому ответ тот же, что у полного перебора.
+    '''
+
+    def __init__(self, polygons, eps=1e-9):
+        if not eps > 0:
+            raise ValueError("eps must be positive")
+        batch = polygons if isinstance(polygons, PolygonBatch) else PolygonBatch.from_polygons(polygons)
+        self.batch = batch
+        self.eps = eps
+        self.cell = 2.0 * eps
+        cx, cy = np.floor(batch.xs / self.cell), np.floor(batch.ys / self.cell)
+        # вершины одной ячейки лежат подряд: ячейка -> отрезок [starts[k], starts[k + 1])
+        self.order = np.lexsort((cy, cx))
+        cx, cy = cx[self.order], cy[self.order]
+        first = np.ones(len(cx), dtype=bool)
+        first[1:] = (cx[1:] != cx[:-1]) | (cy[1:] != cy[:-1])
+        self.starts = np.append(np.flatnonzero(first), len(cx))
+        self.slots = dict(zip(zip(cx[first].tolist(), cy[first].tolist()), range(len(self.starts) - 1)))
+        self.xs, self.ys = batch.xs[self.order], batch.ys[self.order]
+        self.polygon_ids = batch.polygon_ids()[self.order]
+        # копии для any_at: поэлементный доступ к спискам быстрее, чем к массивам numpy
+        self._xs, self._ys, self._starts = self.xs.tolist(), self.ys.tolist(), self.starts.tolist()
+
+    def __len__(self):
+        return len(self.batch)
+
+    def matches(self, points):
+        '''Пары (номер точки запроса, номер полигона) для всех совпавших вершин; повторы возможны.'''
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        qx, qy = points[:, 0], points[:, 1]
+        cx, cy = np.floor(qx / self.cell), np.floor(qy / self.cell)
+        slots = []
+        for dx in (-1.0, 0.0, 1.0):
+            for dy in (-1.0, 0.0, 1.0):
+                keys = zip((cx + dx).tolist(), (cy + dy).tolist())
+                slots.append([self.slots.get(key, -1) for key in keys])
+        slots = np.array(slots, dtype=np.int64).T.ravel()
+        q = np.repeat(np.arange(len(points)), 9)
+        found = slots >= 0
+        q, slots = q[found], slots[found]
+        counts = self.starts[slots + 1] - self.starts[slots]
+        first = np.cumsum(counts) - counts
+        pos = np.repeat(self.starts[slots] - first, counts) + np.arange(counts.sum())
+        q = np.repeat(q, counts)
+        hit = (np.abs(self.xs[pos] - qx[q]) < self.eps) & (np.abs(self.ys[pos] - qy[q]) < self.eps)
+        return q[hit], self.polygon_ids[pos[hit]]
+
+    def any_at(self, points):
+        '''Совпадает ли хотя бы одна из points с какой-нибудь вершиной индекса.
+
+        Обычный цикл без numpy: так дешевле проверять по одному полигону за раз.
+        '''
+        eps, cell = self.eps, self.cell
+        xs, ys, starts = self._xs, self._ys, self._starts
+        for x, y in points:
+            # бесконечные и nan-координаты ни с чем не совпадают
+            if not (math.isfinite(x) and math.isfinite(y)):
+                continue
+            cx, cy = math.floor(x / cell), math.floor(y / cell)
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    k = self.slots.get((cx + dx, cy + dy))
+                    if k is None:
+                        continue
+                    for i in range(starts[k], starts[k + 1]):
+                        if abs(xs[i] - x) < eps and abs(ys[i] - y) < eps:
+                            return True
+        return False
+
+    def polygons_at(self, points):
+        '''Номера полигонов с углом в точке, по возрастанию; для массива точек — список массивов.'''
+        single = np.ndim(points) == 1
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        q, ids = self.matches(points)
+        n = max(len(self), 1)
+        q, ids = np.divmod(np.unique(q * n + ids), n)
+        result = np.split(ids, np.searchsorted(q, np.arange(1, len(points))))
+        return result[0] if single else result
+
+    def mask(self, points):
+        '''Булева маска по полигонам: есть угол хотя бы в одной из точек (одна точка тоже годится).'''
+        _, ids = self.matches(points)
+        return np.bincount(ids, minlength=len(self)) > 0
+
+
+if __name__ == "__main__":
+    import time
+    from shape_ribbon import hexagon_ribbon
+
+    batch = PolygonBatch.from_array(hexagon_ribbon().coords(np.arange(200_000)))
+    start = time.perf_counter()
+    index = CornerIndex(batch)
+    print(f"Индекс по {len(batch.xs)} вершинам построен за {time.perf_counter() - start:.2f} с")
+    rng = np.random.default_rng(0)
+    corners = rng.integers(0, len(batch.xs), 5000)
+    queries = np.column_stack([batch.xs[corners], batch.ys[corners]]) + rng.uniform(-5e-10, 5e-10, (5000, 2))
+    start = time.perf_counter()
+    found = index.polygons_at(queries)
+    print(f"{len(queries)} точек: в среднем {np.mean([len(f) for f in found]):.2f} полигона на точку "
+          f"за {time.perf_counter() - start:.3f} с")
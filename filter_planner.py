@@ -0,0 +1,105 @@
+import time
+from itertools import chain, islice
+
+from metrics_cache import metrics
+
+
+class FilterStats:
+    __slots__ = ('filter', 'cost', 'pass_rate')
+
+    def __init__(self, filter_func, cost, pass_rate):
+        self.filter = filter_func
+        self.cost = cost
+        self.pass_rate = pass_rate
+
+    @property
+    def rank(self):
+        # Классический порядок для конъюнкции предикатов: цена за каждый отсеянный полигон
+        rejected = 1.0 - self.pass_rate
+        return self.cost / rejected if rejected > 0 else float('inf')
+
+    @property
+    def name(self):
+        return getattr(self.filter, '__qualname__', repr(self.filter))
+
+
+class FilterPlan:
+    '''Выбранный порядок фильтров с замеренной ценой и долей прошедших на выборке.'''
+
+    def __init__(self, stats, sample_size):
+        self.stats = stats
+        self.sample_size = sample_size
+
+    @property
+    def filters(self):
+        return [s.filter for s in self.stats]
+
+    def __str__(self):
+        lines = [f"План фильтров (выборка: {self.sample_size} полигонов):"]
+        for i, s in enumerate(self.stats, 1):
+            lines.append(f"  {i}. {s.name}: {s.cost * 1e6:.2f} мкс/полигон, проходит {s.pass_rate:.0%}")
+        return "\n".join(lines)
+
+
+class FilterPlanner:
+    '''Переставляет конъюнктивную цепочку фильтров: дешёвые и сильно отсеивающие идут первыми.
+
+    Фильтр — функция вида inner(polygons) -> iterable, как flt_* из 7.py.
+    Цена и доля прошедших замеряются на первых sample_size полигонах входа;
+    сами полигоны выборки потом проходят через цепочку как обычно.
+    Каждый фильтр замеряется на пустом кэше cache: иначе фильтр, идущий
+    после другого с теми же характеристиками, выглядел бы дешевле, чем есть.
+    План по полной выборке запоминается по набору фильтров и при следующих
+    вызовах не перемеряется; clear() забывает планы (например, если данные сменились).
+    '''
+
+    def __init__(self, sample_size=200, cache=metrics):
+        self.sample_size = sample_size
+        self.cache = cache
+        self.plans = {}
+        self.last_plan = None
+
+    def has_plan(self, filters):
+        return len(filters) < 2 or tuple(filters) in self.plans
+
+    def clear(self):
+        self.plans.clear()
+
+    def measure(self, filter_func, sample):
+        with self.cache.isolated():
+            start = time.perf_counter()
+            passed = sum(1 for _ in filter_func(sample))
+            elapsed = time.perf_counter() - start
+        n = len(sample)
+        return FilterStats(filter_func, elapsed / n, passed / n)
+
+    def plan(self, filters, sample):
+        key = tuple(filters)
+        if key in self.plans:
+            return self.plans[key]
+        if len(filters) < 2 or not sample:
+            return FilterPlan([FilterStats(f, 0.0, 1.0) for f in filters], len(sample))
+        stats = [self.measure(f, sample) for f in filters]
+        # sorted устойчива: при равных оценках сохраняется исходный порядок
+        plan = FilterPlan(sorted(stats, key=lambda s: s.rank), len(sample))
+        # по неполной выборке (короткий вход) план ненадёжен, его не запоминаем
+        if len(sample) >= self.sample_size:
+            self.plans[key] = plan
+        return plan
+
+    def run(self, filters, polygons):
+        filters = list(filters)
+        if len(filters) < 2:
+            # переставлять нечего, вход не трогаем
+            self.last_plan = self.plan(filters, [])
+            result = polygons
+            for f in filters:
+                result = f(result)
+            return result
+        it = iter(polygons)
+        sample = [] if self.has_plan(filters) else list(islice(it, self.sample_size))
+        self.last_plan = self.plan(filters, sample)
+        result = chain(sample, it)
+        for f in self.last_plan.filters:
+            result = f(result)
+        return result
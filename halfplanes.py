@@ -0,0 +1,117 @@
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+
+
+def _compile(coords):
+    # coords формы (..., m, 2) -> единичные внешние нормали (..., m, 2) и смещения (..., m):
+    # точка p внутри, если normals @ p <= offsets для всех сторон
+    edges = np.roll(coords, -1, axis=-2) - coords
+    normals = np.stack([edges[..., 1], -edges[..., 0]], axis=-1)
+    # для обхода по часовой стрелке нормали (dy, -dx) смотрят внутрь — разворачиваем
+    x, y = coords[..., 0], coords[..., 1]
+    signed = np.sum(x * np.roll(y, -1, axis=-1) - np.roll(x, -1, axis=-1) * y, axis=-1)
+    normals = normals * np.where(signed < 0, -1.0, 1.0)[..., None, None]
+    length = np.hypot(normals[..., 0], normals[..., 1])
+    normals = normals / np.where(length > 0, length, 1.0)[..., None]
+    offsets = np.sum(normals * coords, axis=-1)
+    # вырожденная сторона нулевой длины ничего не ограничивает
+    offsets[length == 0] = np.inf
+    # у контура нулевой площади (все вершины на одной прямой) нормали задают не
+    # многоугольник, а прямую; внутри него не лежит ничего
+    offsets[signed == 0] = -np.inf
+    return normals, offsets
+
+
+def _key(polygon):
+    # Ключ кэша compile_halfplanes: кортежи берутся как есть, остальное приводится к кортежам
+    try:
+        hash(polygon)
+        return polygon
+    except TypeError:
+        return tuple(map(tuple, polygon))
+
+
+# LRU-кэш полуплоскостей по содержимому полигона. Свой, а не lru_cache: промахи
+# целой пачки компилируются одним векторным вызовом и кладутся в кэш разом
+_cache = OrderedDict()
+CACHE_SIZE = 65536
+
+
+def _remember(key, compiled):
+    _cache[key] = compiled
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def compile_halfplanes(polygon):
+    '''Полуплоскости выпуклого полигона: (нормали (m, 2), смещения (m,)). Результат кэшируется.'''
+    key = _key(polygon)
+    compiled = _cache.get(key)
+    if compiled is None:
+        compiled = _compile(np.asarray(polygon, dtype=np.float64))
+        _remember(key, compiled)
+    else:
+        _cache.move_to_end(key)
+    return compiled
+
+
+def compile_many(polygons):
+    '''Полуплоскости полигонов с одинаковым числом вершин m: массивы (g, m, 2) и (g, m), через кэш.'''
+    keys = [_key(p) for p in polygons]
+    compiled = [_cache.get(key) for key in keys]
+    missing = [i for i, c in enumerate(compiled) if c is None]
+    if missing:
+        normals, offsets = _compile(np.array([polygons[i] for i in missing], dtype=np.float64))
+        for j, i in enumerate(missing):
+            compiled[i] = (normals[j], offsets[j])
+            _remember(keys[i], compiled[i])
+    for key in keys:
+        if key in _cache:
+            _cache.move_to_end(key)
+    return np.stack([c[0] for c in compiled]), np.stack([c[1] for c in compiled])
+
+
+def halfplanes_contain(polygon, points, boundary=True, eps=1e-9):
+    # Булев массив: какие из points лежат внутри выпуклого polygon
+    normals, offsets = compile_halfplanes(_key(polygon))
+    values = np.asarray(points, dtype=np.float64).reshape(-1, 2) @ normals.T
+    inside = values <= offsets + eps if boundary else values < offsets - eps
+    return inside.all(axis=1)
+
+
+def any_vertex_inside(reference, polygons, boundary=True, corners=True, eps=1e-9, budget=4_000_000):
+    '''Для каждого выпуклого полигона из polygons: лежит ли в нём хотя бы одна вершина reference.
+
+    Полуплоскости каждого полигона берутся из кэша (compile_many), так что
+    повторные проверки тех же полигонов их не пересчитывают. Полигоны
+    группируются по числу вершин; проверка всех вершин reference для группы —
+    одно матричное сравнение. Большие группы делятся так, чтобы в сравнении
+    было не больше budget элементов. corners=False — вершина reference,
+    совпадающая с вершиной полигона, внутри не считается.
+    '''
+    ref = np.asarray(reference, dtype=np.float64).reshape(-1, 2)
+    result = np.zeros(len(polygons), dtype=bool)
+    groups = defaultdict(list)
+    for i, p in enumerate(polygons):
+        groups[len(p)].append(i)
+    for m, ids in groups.items():
+        if m == 0:
+            continue
+        step = max(1, budget // (m * len(ref)))
+        for lo in range(0, len(ids), step):
+            part = ids[lo:lo + step]
+            normals, offsets = compile_many([polygons[i] for i in part])
+            values = np.einsum('gmc,kc->gmk', normals, ref)
+            limit = offsets[..., None]
+            inside = (values <= limit + eps if boundary else values < limit - eps).all(axis=1)
+            if not corners:
+                # на совпадение с вершинами проверяются только пары, прошедшие сравнение
+                g, k = np.nonzero(inside)
+                if len(g):
+                    rows, row = np.unique(g, return_inverse=True)
+                    coords = np.array([polygons[part[r]] for r in rows.tolist()], dtype=np.float64)
+                    same = (coords[row] == ref[k][:, None, :]).all(axis=-1).any(axis=-1)
+                    inside[g[same], k[same]] = False
+            result[part] = inside.any(axis=1)
+    return result
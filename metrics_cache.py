@@ -0,0 +1,168 @@
+import math
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import chain, islice
+
+from predicates import is_convex
+
+
+def _next_vertices(polygon):
+    # Вершины, сдвинутые на одну вперёд по кругу; срез кортежа быстрее, для
+    # остальных последовательностей (в том числе ndarray) — обход без копии
+    if isinstance(polygon, tuple):
+        return polygon[1:] + polygon[:1]
+    return chain(islice(polygon, 1, None), islice(polygon, 1))
+
+
+def _area(polygon):
+    return 0.5 * abs(sum(x1*y2 - x2*y1 for (x1, y1), (x2, y2) in zip(polygon, _next_vertices(polygon))))
+
+
+def _sides(polygon):
+    return tuple(map(math.dist, polygon, _next_vertices(polygon)))
+
+
+def _perimeter(polygon):
+    return math.fsum(_sides(polygon))
+
+
+def _bbox(polygon):
+    xs = [p[0] for p in polygon]
+    ys = [p[1] for p in polygon]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _centroid(polygon):
+    # Центр масс фигуры; для вырожденной (нулевой площади) — среднее вершин
+    n = len(polygon)
+    a = cx = cy = 0.0
+    for i in range(n):
+        x1, y1 = polygon[i]
+        x2, y2 = polygon[(i+1)%n]
+        c = x1*y2 - x2*y1
+        a += c
+        cx += (x1 + x2) * c
+        cy += (y1 + y2) * c
+    if a == 0:
+        return (sum(p[0] for p in polygon) / n, sum(p[1] for p in polygon) / n)
+    return (cx / (3*a), cy / (3*a))
+
+
+def _origin_distance(polygon):
+    # та же формула, что dist_to_origin в 8.py, чтобы сравнения совпадали до бита
+    return min(math.sqrt(p[0]**2 + p[1]**2) for p in polygon)
+
+
+class MetricsCache:
+    '''LRU-кэш производных характеристик полигона.
+
+    Каждая характеристика считается при первом запросе и хранится, пока
+    полигон не вытеснен. hits/misses считаются по каждой характеристике.
+
+    Ключ — id(polygon): хешировать содержимое кортежа дороже, чем посчитать
+    площадь или стороны небольшого полигона. Запись держит ссылку на сам
+    полигон, поэтому его id не может достаться другому объекту, пока запись
+    в кэше. Списки (их можно изменить на месте) не кэшируются. Полигоны
+    меньше чем из min_vertices вершин тоже считаются напрямую: запись и
+    поиск в кэше обходятся им дороже самого вычисления.
+    '''
+
+    metrics = {
+        'area': _area,
+        'sides': _sides,
+        'perimeter': _perimeter,
+        'bbox': _bbox,
+        'centroid': _centroid,
+        'is_convex': is_convex,
+        'origin_distance': _origin_distance,
+    }
+
+    def __init__(self, maxsize=100_000, min_vertices=64):
+        self.maxsize = maxsize
+        self.min_vertices = min_vertices
+        self.entries = OrderedDict()
+        self.hits = dict.fromkeys(self.metrics, 0)
+        self.misses = dict.fromkeys(self.metrics, 0)
+
+    def get(self, polygon, metric):
+        if len(polygon) < self.min_vertices or isinstance(polygon, list):
+            return self.metrics[metric](polygon)
+        entries = self.entries
+        key = id(polygon)
+        entry = entries.get(key)
+        if entry is not None:
+            entries.move_to_end(key)
+            values = entry[1]
+            if metric in values:
+                self.hits[metric] += 1
+                return values[metric]
+        self.misses[metric] += 1
+        value = self.metrics[metric](polygon)
+        if entry is None:
+            # (полигон, значения): ссылка на полигон не даёт освободить его id
+            entries[key] = (polygon, {metric: value})
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+        else:
+            values[metric] = value
+        return value
+
+    def area(self, polygon):
+        if len(polygon) < self.min_vertices:
+            return _area(polygon)
+        return self.get(polygon, 'area')
+
+    def sides(self, polygon):
+        if len(polygon) < self.min_vertices:
+            return _sides(polygon)
+        return self.get(polygon, 'sides')
+
+    def perimeter(self, polygon):
+        if len(polygon) < self.min_vertices:
+            return _perimeter(polygon)
+        return self.get(polygon, 'perimeter')
+
+    def bbox(self, polygon):
+        if len(polygon) < self.min_vertices:
+            return _bbox(polygon)
+        return self.get(polygon, 'bbox')
+
+    def centroid(self, polygon):
+        if len(polygon) < self.min_vertices:
+            return _centroid(polygon)
+        return self.get(polygon, 'centroid')
+
+    def is_convex(self, polygon):
+        if len(polygon) < self.min_vertices:
+            return is_convex(polygon)
+        return self.get(polygon, 'is_convex')
+
+    def origin_distance(self, polygon):
+        if len(polygon) < self.min_vertices:
+            return _origin_distance(polygon)
+        return self.get(polygon, 'origin_distance')
+
+    def stats(self):
+        return {'size': len(self.entries), 'hits': dict(self.hits), 'misses': dict(self.misses)}
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = dict.fromkeys(self.metrics, 0)
+        self.misses = dict.fromkeys(self.metrics, 0)
+
+    @contextmanager
+    def isolated(self):
+        '''Временно пустой кэш: внутри блока всё считается заново, после него
+        возвращаются прежние записи и счётчики (посчитанное внутри отбрасывается).'''
+        saved = self.entries, self.hits, self.misses
+        self.entries = OrderedDict()
+        self.hits = dict.fromkeys(self.metrics, 0)
+        self.misses = dict.fromkeys(self.metrics, 0)
+        try:
+            yield self
+        finally:
+            self.entries, self.hits, self.misses = saved
+
+
+# Общий кэш для фильтров и агрегаторов одного запуска
+metrics = MetricsCache()
@@ -0,0 +1,183 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from polygon_batch import PolygonBatch
+from sweep_intersect import intersecting_pairs
+
+
+class OverlapGraph:
+    '''Граф перекрытий: вершины — полигоны, ребро — пара пересекающихся полигонов.
+
+    Смежность хранится в формате CSR: соседи вершины v — indices[indptr[v]:indptr[v + 1]],
+    по возрастанию. areas (если известны) нужны для порядка 'area' в
+    maximal_independent_set.
+    '''
+
+    def __init__(self, n, i, j, areas=None):
+        i = np.asarray(i, dtype=np.int64)
+        j = np.asarray(j, dtype=np.int64)
+        src = np.concatenate([i, j])
+        dst = np.concatenate([j, i])
+        order = np.lexsort((dst, src))
+        self.n = n
+        self.indices = dst[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self.indptr[1:])
+        self.areas = None if areas is None else np.asarray(areas, dtype=np.float64)
+
+    @classmethod
+    def from_polygons(cls, polygons):
+        batch = polygons if isinstance(polygons, PolygonBatch) else PolygonBatch.from_polygons(polygons)
+        i, j = intersecting_pairs(batch)
+        return cls(len(batch), i, j, batch.areas())
+
+    def __len__(self):
+        return self.n
+
+    def neighbors(self, v):
+        return self.indices[self.indptr[v]:self.indptr[v + 1]]
+
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def edges(self):
+        # Каждое ребро один раз: (i, j), i < j
+        src = np.repeat(np.arange(self.n), self.degrees())
+        keep = src < self.indices
+        return src[keep], self.indices[keep]
+
+    def components(self):
+        '''Номер кластера перекрытий для каждой вершины (наименьший номер вершины в кластере).
+
+        Связывание и сжатие путей над массивами: число проходов — O(log n).
+        '''
+        labels = np.arange(self.n)
+        i, j = self.edges()
+        while True:
+            li, lj = labels[i], labels[j]
+            differ = li != lj
+            if not differ.any():
+                return labels
+            low = np.minimum(li, lj)[differ]
+            np.minimum.at(labels, li[differ], low)
+            np.minimum.at(labels, lj[differ], low)
+            while True:
+                parent = labels[labels]
+                if np.array_equal(parent, labels):
+                    break
+                labels = parent
+
+    def clusters(self, min_size=1):
+        '''Кластеры перекрытий — массивы номеров вершин по возрастанию; сами кластеры по первой вершине.'''
+        labels = self.components()
+        order = np.argsort(labels, kind='stable')
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+        groups = np.split(order, bounds)
+        return [g for g in groups if len(g) >= min_size]
+
+    def subgraph(self, vertices):
+        '''Подграф на vertices (в этом порядке): вершина k подграфа — vertices[k].'''
+        vertices = np.asarray(vertices, dtype=np.int64)
+        local = np.full(self.n, -1, dtype=np.int64)
+        local[vertices] = np.arange(len(vertices))
+        i, j = self.edges()
+        keep = (local[i] >= 0) & (local[j] >= 0)
+        areas = None if self.areas is None else self.areas[vertices]
+        return OverlapGraph(len(vertices), local[i[keep]], local[j[keep]], areas)
+
+    def _order(self, order):
+        if isinstance(order, str):
+            if order == 'input':
+                return np.arange(self.n)
+            if order == 'area':
+                if self.areas is None:
+                    raise ValueError("order='area' needs areas, build the graph with from_polygons")
+                return np.argsort(self.areas, kind='stable')
+            if order == 'degree':
+                return np.argsort(self.degrees(), kind='stable')
+            raise ValueError("order must be 'input', 'area', 'degree' or an array of keys")
+        # массив ключей: меньший ключ — раньше, при равенстве — по номеру
+        return np.argsort(np.asarray(order), kind='stable')
+
+    def maximal_independent_set(self, order='input', workers=None):
+        '''Жадное максимальное независимое множество: вершины по порядку, берётся каждая,
+        у которой ещё нет взятых соседей.
+
+        order: 'input' — как filter_non_intersecting из 63.py (тот же результат),
+        'area' — сначала меньшие по площади, 'degree' — сначала с меньшим числом
+        перекрытий, или массив ключей на каждую вершину. Кластеры независимы,
+        поэтому при workers > 1 они считаются в пуле процессов; результат тот же.
+        Возвращает номера взятых вершин по возрастанию.
+        '''
+        keys = np.empty(self.n, dtype=np.int64)
+        keys[self._order(order)] = np.arange(self.n)
+        if not workers or workers <= 1:
+            return np.sort(_greedy(self.indptr, self.indices, np.argsort(keys)))
+        # одиночные вершины берутся всегда, считать в пуле имеет смысл только кластеры
+        chosen = [np.flatnonzero(self.degrees() == 0)]
+        tasks = []
+        for vertices in _balance(self.clusters(min_size=2), 4 * workers):
+            sub = self.subgraph(vertices)
+            tasks.append((vertices, sub.indptr, sub.indices, np.argsort(keys[vertices], kind='stable')))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_greedy, indptr, indices, order) for _, indptr, indices, order in tasks]
+            for (vertices, *_), future in zip(tasks, futures):
+                chosen.append(vertices[future.result()])
+        return np.sort(np.concatenate(chosen))
+
+    def map_clusters(self, func, workers=None, min_size=2):
+        '''func(subgraph, vertices) для каждого кластера из min_size и больше вершин, в пуле процессов.
+
+        func должна быть функцией уровня модуля (её передают в другой процесс).
+        Результаты возвращаются в порядке clusters().
+        '''
+        clusters = self.clusters(min_size)
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(func, self.subgraph(c), c) for c in clusters]
+            return [f.result() for f in futures]
+
+
+def _greedy(indptr, indices, order):
+    # Жадный проход: order — вершины в порядке рассмотрения; возвращает взятые
+    blocked = np.zeros(len(indptr) - 1, dtype=bool)
+    taken = []
+    for v in order.tolist():
+        if not blocked[v]:
+            taken.append(v)
+            blocked[indices[indptr[v]:indptr[v + 1]]] = True
+    return np.array(taken, dtype=np.int64)
+
+
+def _balance(clusters, parts):
+    # Склеивает кластеры в parts примерно равных по числу вершин групп (крупные — первыми)
+    groups = [[] for _ in range(max(1, min(parts, len(clusters))))]
+    sizes = np.zeros(len(groups), dtype=np.int64)
+    for c in sorted(clusters, key=len, reverse=True):
+        k = int(np.argmin(sizes))
+        groups[k].append(c)
+        sizes[k] += len(c)
+    return [np.concatenate(g) for g in groups if g]
+
+
+if __name__ == "__main__":
+    import time
+    from shape_ribbon import hexagon_ribbon
+
+    ribbon = hexagon_ribbon()
+    rows, cols = 300, 300
+    index = np.arange(rows * cols)
+    coords = ribbon.coords(index % cols)
+    # через каждые десять рядов — зазор, так что кластеры — полосы по десять рядов
+    coords[:, :, 1] += ((index // cols) * 0.8 + (index // cols // 10) * 2.0)[:, None]
+    start = time.perf_counter()
+    graph = OverlapGraph.from_polygons(PolygonBatch.from_array(coords))
+    print(f"Граф: {len(graph)} вершин, {len(graph.edges()[0])} рёбер за {time.perf_counter() - start:.2f} с")
+    print("Кластеров:", len(graph.clusters(min_size=2)))
+    for order in ('input', 'area', 'degree'):
+        print(f"Независимое множество, порядок {order!r}: {len(graph.maximal_independent_set(order))}")
+    start = time.perf_counter()
+    mis = graph.maximal_independent_set('input', workers=2)
+    print(f"То же в пуле из 2 процессов: {len(mis)} за {time.perf_counter() - start:.2f} с")
@@ -0,0 +1,206 @@
+import time
+from itertools import chain, compress, islice
+
+import numpy as np
+
+import profiling
+from affine import Affine
+from filter_planner import FilterPlanner
+from polygon_batch import PolygonBatch
+
+FILTER = 'filter'
+TRANSFORM = 'transform'
+
+_END = object()
+
+
+def filter_mask(filter_func, polygons):
+    '''Булева маска фильтра по списку полигонов или PolygonBatch.
+
+    Фильтр должен нести векторное ядро .batch(polygons) -> маска и/или проверку
+    одного полигона .predicate(p) (см. masked). Для PolygonBatch сначала берётся
+    ядро, для списка — проверка по одному (дешёвые фильтры с кешем метрик так быстрее).
+    '''
+    kernel = getattr(filter_func, 'batch', None)
+    predicate = getattr(filter_func, 'predicate', None)
+    if kernel is not None and (predicate is None or isinstance(polygons, PolygonBatch)):
+        return np.asarray(kernel(polygons), dtype=bool)
+    return np.fromiter(map(predicate, polygons), dtype=bool, count=len(polygons))
+
+
+def masked(kind, func):
+    # Шаг, который считается по пачкам: преобразование или фильтр с ядром/проверкой.
+    # Обычный фильтр может отдавать новые объекты, и сопоставить его выход со входом
+    # нельзя, поэтому он получает поток целиком
+    return kind == TRANSFORM or getattr(func, 'batch', None) is not None \
+        or getattr(func, 'predicate', None) is not None
+
+
+def apply_filter(filter_func, polygons):
+    # Пачка -> пачка, список -> список
+    if masked(FILTER, filter_func):
+        mask = filter_mask(filter_func, polygons)
+        if isinstance(polygons, PolygonBatch):
+            return polygons.take(mask)
+        return list(compress(polygons, mask))
+    if isinstance(polygons, PolygonBatch):
+        return PolygonBatch.from_polygons(filter_func(iter(polygons)))
+    return list(filter_func(polygons))
+
+
+def apply_transform(transform, polygons):
+    # Пачка -> пачка, список -> список; Affine считается векторно
+    if isinstance(polygons, PolygonBatch):
+        if isinstance(transform, Affine):
+            return transform.apply_batch(polygons)
+        return PolygonBatch.from_polygons(map(transform, polygons))
+    if isinstance(transform, Affine):
+        return transform.apply(polygons)
+    return list(map(transform, polygons))
+
+
+def stage_name(func):
+    # flt_square.<locals>.inner -> flt_square
+    if isinstance(func, Affine):
+        return 'Affine'
+    return getattr(func, '__qualname__', type(func).__name__).split('.<locals>')[0]
+
+
+def fold(stages):
+    '''Сворачивает подряд идущие Affine-преобразования в одно и группирует подряд идущие фильтры.
+
+    Результат — список шагов (TRANSFORM, функция) и (FILTER, [фильтры]).
+    '''
+    steps = []
+    for kind, func in stages:
+        if steps and kind == TRANSFORM and steps[-1][0] == TRANSFORM \
+                and isinstance(func, Affine) and isinstance(steps[-1][1], Affine):
+            steps[-1] = (TRANSFORM, steps[-1][1].then(func))
+        elif steps and kind == FILTER and steps[-1][0] == FILTER:
+            steps[-1][1].append(func)
+        else:
+            steps.append((kind, [func] if kind == FILTER else func))
+    return steps
+
+
+class Pipeline:
+    '''Цепочка фильтров и преобразований, выполняемая за один проход.
+
+    stages — список (FILTER, flt) и (TRANSFORM, tr) в порядке применения.
+    Подряд идущие Affine складываются в одну матрицу. Обычный итерируемый вход
+    идёт одним генератором по пачкам chunk_size полигонов: каждая пачка проходит
+    все шаги подряд, и каждый следующий шаг видит только выживших. Фильтр без
+    .batch и .predicate может отдавать новые объекты, поэтому он получает не
+    пачки, а весь поток целиком. PolygonBatch обрабатывается целиком: Affine —
+    над массивами координат, фильтры — масками, результат тоже PolygonBatch.
+    Порядок фильтров внутри каждой группы выбирает FilterPlanner по выборке
+    из начала входа, прошедшей предыдущие шаги.
+    '''
+
+    def __init__(self, stages, sample_size=200, chunk_size=4096, name='pipeline'):
+        self.name = name
+        self.stages = list(stages)
+        self.steps = fold(self.stages)
+        self.planner = FilterPlanner(sample_size)
+        self.chunk_size = chunk_size
+
+    def _plan(self, sample):
+        planned = []
+        for kind, op in self.steps:
+            if kind == FILTER:
+                self.planner.last_plan = self.planner.plan(op, sample)
+                op = self.planner.last_plan.filters
+            planned.append((kind, op))
+            sample = self._step(kind, op, sample, record=False)
+        return planned
+
+    def _needs_plan(self):
+        return any(kind == FILTER and not self.planner.has_plan(op) for kind, op in self.steps)
+
+    @staticmethod
+    def _apply(kind, func, polygons):
+        if kind == TRANSFORM:
+            return apply_transform(func, polygons)
+        return apply_filter(func, polygons)
+
+    def _step(self, kind, op, polygons, record=True):
+        profile = profiling._active if record else None
+        for func in (op if kind == FILTER else [op]):
+            if not len(polygons):
+                break
+            if profile is None:
+                polygons = self._apply(kind, func, polygons)
+                continue
+            count, vertices = profiling.measure(polygons)
+            start = time.perf_counter()
+            polygons = self._apply(kind, func, polygons)
+            profile.record(self.name, stage_name(func), kind, count, len(polygons), vertices,
+                           time.perf_counter() - start)
+        return polygons
+
+    def run(self, polygons):
+        if isinstance(polygons, PolygonBatch):
+            return self.run_batch(polygons)
+        it = iter(polygons)
+        sample = list(islice(it, self.planner.sample_size)) if self._needs_plan() else []
+        stream = chain(sample, it)
+        # шаги по пачкам идут группами через _loop, обычные фильтры — через _stream
+        chunked = []
+        for kind, op in self._plan(sample):
+            for func in (op if kind == FILTER else [op]):
+                if masked(kind, func):
+                    chunked.append((kind, [func] if kind == FILTER else func))
+                    continue
+                if chunked:
+                    stream, chunked = self._loop(chunked, stream), []
+                stream = self._stream(func, stream)
+        return self._loop(chunked, stream) if chunked else stream
+
+    def _loop(self, steps, it):
+        while True:
+            chunk = list(islice(it, self.chunk_size))
+            if not chunk:
+                return
+            for kind, op in steps:
+                chunk = self._step(kind, op, chunk)
+            yield from chunk
+
+    def _stream(self, filter_func, it):
+        # Фильтр без ядра получает весь поток; в профиль идёт время внутри самого
+        # фильтра, без времени предыдущих шагов, которые отдают ему полигоны
+        profile = profiling._active
+        if profile is None:
+            yield from filter_func(it)
+            return
+        source = profiling._Counting(it)
+        upstream = 0.0
+        def timed():
+            nonlocal upstream
+            items = iter(source)
+            while True:
+                start = time.perf_counter()
+                p = next(items, _END)
+                upstream += time.perf_counter() - start
+                if p is _END:
+                    return
+                yield p
+        out = iter(filter_func(timed()))
+        passed, spent = 0, 0.0
+        while True:
+            start = time.perf_counter()
+            p = next(out, _END)
+            spent += time.perf_counter() - start
+            if p is _END:
+                break
+            passed += 1
+            yield p
+        profile.record(self.name, stage_name(filter_func), FILTER, source.count, passed, source.vertices,
+                       spent - upstream)
+
+    def run_batch(self, batch):
+        sample = list(batch[:self.planner.sample_size]) if self._needs_plan() else []
+        for kind, op in self._plan(sample):
+            batch = self._step(kind, op, batch)
+        return batch
+
+    __call__ = run
@@ -0,0 +1,108 @@
+import numpy as np
+
+from polygon_batch import PolygonBatch
+from predicates import orient2d_det
+
+
+def _as_batch(polygons):
+    return polygons if isinstance(polygons, PolygonBatch) else PolygonBatch.from_polygons(polygons)
+
+
+def _candidate_pairs(order, px, py, bboxes, lo, hi):
+    # Пары (точка, полигон), у которых точка лежит в bbox полигона.
+    # Точки отсортированы по x, для каждого полигона отрезок [lo, hi) найден через searchsorted.
+    counts = np.maximum(hi - lo, 0)
+    total = counts.sum()
+    poly = np.repeat(np.arange(len(bboxes)), counts)
+    first = np.cumsum(counts) - counts
+    pt = order[np.repeat(lo, counts) + np.arange(total) - np.repeat(first, counts)]
+    keep = (py[pt] >= bboxes[poly, 1]) & (py[pt] <= bboxes[poly, 3])
+    return pt[keep], poly[keep]
+
+
+def _winding(batch, nxt, px, py, pt, poly):
+    # Число оборотов и признак «на границе» для каждой пары (точка, полигон)
+    counts = batch.counts()[poly]
+    starts = np.cumsum(counts) - counts
+    local = np.arange(counts.sum()) - np.repeat(starts, counts)
+    e = np.repeat(batch.offsets[:-1][poly], counts) + local
+    x1, y1 = batch.xs[e], batch.ys[e]
+    x2, y2 = batch.xs[nxt[e]], batch.ys[nxt[e]]
+    qx = np.repeat(px[pt], counts)
+    qy = np.repeat(py[pt], counts)
+    # точный знак: точки на стороне и рядом с ней не путаются из-за округления
+    orient = orient2d_det(x1, y1, x2, y2, qx, qy)
+    up = (y1 <= qy) & (qy < y2) & (orient > 0)
+    down = (y2 <= qy) & (qy < y1) & (orient < 0)
+    on_edge = ((orient == 0)
+               & (np.minimum(x1, x2) <= qx) & (qx <= np.maximum(x1, x2))
+               & (np.minimum(y1, y2) <= qy) & (qy <= np.maximum(y1, y2)))
+    wn = np.add.reduceat(up.astype(np.int64) - down, starts) if len(e) else np.zeros(0, np.int64)
+    boundary = np.logical_or.reduceat(on_edge, starts) if len(e) else np.zeros(0, bool)
+    return wn, boundary
+
+
+def points_in_polygons(points, polygons, rule='evenodd', boundary=True, budget=4_000_000):
+    '''Все пары (точка, полигон), где точка лежит внутри полигона.
+
+    Работает для невыпуклых полигонов: правило 'evenodd' (чётность пересечений)
+    или 'nonzero' (ненулевое число оборотов). boundary — считать ли точки
+    на границе лежащими внутри. Кандидаты отбираются по bbox, точное
+    испытание идёт только для них; полигоны обрабатываются группами так,
+    чтобы на группу приходилось не больше budget проверок «точка-сторона».
+    Возвращает массивы (индексы точек, индексы полигонов).
+    '''
+    if rule not in ('evenodd', 'nonzero'):
+        raise ValueError("rule must be 'evenodd' or 'nonzero'")
+    batch = _as_batch(polygons)
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    px, py = pts[:, 0], pts[:, 1]
+    counts = batch.counts()
+    bboxes = batch.bboxes()
+    nxt = batch._next_index()
+    order = np.argsort(px, kind='stable')
+    sx = px[order]
+    lo = np.searchsorted(sx, bboxes[:, 0], side='left')
+    hi = np.searchsorted(sx, bboxes[:, 2], side='right')
+    hi[counts == 0] = lo[counts == 0]
+    # границы групп по накопленному объёму работы
+    work = np.cumsum(np.maximum(hi - lo, 0) * np.maximum(counts, 1))
+    bounds = np.searchsorted(work, np.arange(budget, work[-1] if len(work) else 0, budget), side='right')
+    bounds = np.unique(np.concatenate([[0], bounds, [len(batch)]]))
+    found_pt, found_poly = [], []
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        pt, poly = _candidate_pairs(order, px, py, bboxes[a:b], lo[a:b], hi[a:b])
+        poly += a
+        wn, on_edge = _winding(batch, nxt, px, py, pt, poly)
+        inside = (wn % 2 != 0) if rule == 'evenodd' else (wn != 0)
+        inside = (inside | on_edge) if boundary else (inside & ~on_edge)
+        found_pt.append(pt[inside])
+        found_poly.append(poly[inside])
+    if not found_pt:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    return np.concatenate(found_pt), np.concatenate(found_poly)
+
+
+def pairs_contain(points, polygons, poly, rule='evenodd', boundary=True):
+    '''Для пар (points[k], полигон poly[k]): лежит ли точка в полигоне. Без отбора по bbox.'''
+    batch = _as_batch(polygons)
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    poly = np.asarray(poly, dtype=np.int64)
+    if not len(poly):
+        return np.zeros(0, dtype=bool)
+    wn, on_edge = _winding(batch, batch._next_index(), pts[:, 0], pts[:, 1], np.arange(len(poly)), poly)
+    inside = (wn % 2 != 0) if rule == 'evenodd' else (wn != 0)
+    return (inside | on_edge) if boundary else (inside & ~on_edge)
+
+
+def polygons_containing(point, polygons, rule='evenodd', boundary=True):
+    # Булева маска полигонов, содержащих одну точку
+    batch = _as_batch(polygons)
+    mask = np.zeros(len(batch), dtype=bool)
+    _, poly = points_in_polygons([point], batch, rule, boundary)
+    mask[poly] = True
+    return mask
+
+
+def point_in_polygon(point, polygon, rule='evenodd', boundary=True):
+    return bool(polygons_containing(point, [polygon], rule, boundary)[0])
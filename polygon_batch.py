@@ -0,0 +1,194 @@
+import numpy as np
+
+from predicates import orient2d_batch
+
+
+class PolygonBatch:
+    '''Набор полигонов в колоночном виде: плоские массивы xs, ys и массив смещений offsets.
+
+    Вершины полигона i лежат в xs[offsets[i]:offsets[i+1]], ys[offsets[i]:offsets[i+1]].
+    '''
+
+    def __init__(self, xs, ys, offsets, validate=True):
+        # validate=False — для смещений, которые уже проверены или записаны нами же:
+        # проверка проходит по всему массиву смещений
+        self.xs = np.asarray(xs, dtype=np.float64)
+        self.ys = np.asarray(ys, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if not validate:
+            return
+        if self.xs.shape != self.ys.shape:
+            raise ValueError("xs and ys must have the same length")
+        if (self.offsets.ndim != 1 or len(self.offsets) == 0
+                or self.offsets[0] != 0 or self.offsets[-1] != len(self.xs)):
+            raise ValueError("offsets must start at 0 and end at the number of vertices")
+        if (self.offsets[1:] < self.offsets[:-1]).any():
+            raise ValueError("offsets must be non-decreasing")
+
+    @classmethod
+    def from_polygons(cls, polygons):
+        xs = []
+        ys = []
+        offsets = [0]
+        for poly in polygons:
+            for x, y in poly:
+                xs.append(x)
+                ys.append(y)
+            offsets.append(len(xs))
+        return cls(xs, ys, offsets)
+
+    @classmethod
+    def from_array(cls, coords):
+        # Полигоны с одинаковым числом вершин: массив формы (n, m, 2)
+        coords = np.asarray(coords, dtype=np.float64)
+        n, m = coords.shape[0], coords.shape[1]
+        flat = coords.reshape(n * m, 2)
+        return cls(flat[:, 0], flat[:, 1], np.arange(n + 1, dtype=np.int64) * m)
+
+    @classmethod
+    def concatenate(cls, batches):
+        batches = list(batches)
+        if not batches:
+            return cls([], [], [0])
+        shifts = np.cumsum([0] + [len(b.xs) for b in batches[:-1]])
+        offsets = [batches[0].offsets[:1]] + [b.offsets[1:] + s for b, s in zip(batches, shifts)]
+        return cls(np.concatenate([b.xs for b in batches]),
+                   np.concatenate([b.ys for b in batches]),
+                   np.concatenate(offsets))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return self.take(np.arange(start, stop, step))
+            stop = max(start, stop)
+            lo, hi = self.offsets[start], self.offsets[stop]
+            return PolygonBatch(self.xs[lo:hi], self.ys[lo:hi], self.offsets[start:stop + 1] - lo, validate=False)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("polygon index out of range")
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        return tuple(zip(self.xs[lo:hi].tolist(), self.ys[lo:hi].tolist()))
+
+    def __iter__(self):
+        xs = self.xs.tolist()
+        ys = self.ys.tolist()
+        offsets = self.offsets.tolist()
+        for lo, hi in zip(offsets, offsets[1:]):
+            yield tuple(zip(xs[lo:hi], ys[lo:hi]))
+
+    def take(self, indices):
+        # Выборка полигонов по индексам или булевой маске
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        elif indices.size == 0:
+            # np.asarray([]) — массив float64, им индексировать нельзя
+            indices = np.empty(0, dtype=np.intp)
+        counts = self.counts()[indices]
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        src = np.repeat(self.offsets[:-1][indices] - offsets[:-1], counts) + np.arange(offsets[-1])
+        return PolygonBatch(self.xs[src], self.ys[src], offsets, validate=False)
+
+    def to_polygons(self):
+        return list(self)
+
+    def counts(self):
+        return np.diff(self.offsets)
+
+    def polygon_ids(self):
+        # Номер полигона для каждой вершины
+        return np.repeat(np.arange(len(self)), self.counts())
+
+    def _next_index(self, shift=1):
+        # Индекс вершины, отстоящей на shift позиций вперёд внутри своего полигона
+        counts = self.counts()
+        starts = np.repeat(self.offsets[:-1], counts)
+        sizes = np.repeat(counts, counts)
+        local = np.arange(len(self.xs)) - starts
+        return starts + (local + shift) % np.maximum(sizes, 1)
+
+    def _reduce(self, ufunc, values, empty=0.0):
+        # Свёртка значений по вершинам каждого полигона; пустые полигоны получают empty
+        counts = self.counts()
+        out = np.full(len(self), empty, dtype=values.dtype)
+        nonempty = counts > 0
+        if values.size:
+            out[nonempty] = ufunc.reduceat(values, self.offsets[:-1][nonempty])
+        return out
+
+    def bboxes(self):
+        # (xmin, ymin, xmax, ymax) для каждого полигона
+        return np.column_stack([
+            self._reduce(np.minimum, self.xs, np.nan),
+            self._reduce(np.minimum, self.ys, np.nan),
+            self._reduce(np.maximum, self.xs, np.nan),
+            self._reduce(np.maximum, self.ys, np.nan),
+        ])
+
+    def signed_areas(self):
+        nxt = self._next_index()
+        terms = self.xs * self.ys[nxt] - self.xs[nxt] * self.ys
+        return 0.5 * self._reduce(np.add, terms)
+
+    def areas(self):
+        # Площадь по формуле Гаусса, как polygon_area
+        return np.abs(self.signed_areas())
+
+    def side_lengths(self):
+        # Плоский массив длин сторон; сторона i идёт от вершины i к следующей
+        nxt = self._next_index()
+        return np.hypot(self.xs[nxt] - self.xs, self.ys[nxt] - self.ys)
+
+    def sides(self):
+        # Длины сторон по полигонам, как polygon_sides
+        sides = self.side_lengths()
+        return [sides[lo:hi] for lo, hi in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def perimeters(self):
+        return self._reduce(np.add, self.side_lengths())
+
+    def min_sides(self):
+        return self._reduce(np.minimum, self.side_lengths(), np.nan)
+
+    def max_sides(self):
+        return self._reduce(np.maximum, self.side_lengths(), 0.0)
+
+    def turn_crosses(self):
+        # Векторное произведение (p[i+1]-p[i]) x (p[i+2]-p[i]) для каждой вершины
+        i1 = self._next_index(1)
+        i2 = self._next_index(2)
+        return ((self.xs[i1] - self.xs) * (self.ys[i2] - self.ys)
+                - (self.ys[i1] - self.ys) * (self.xs[i2] - self.xs))
+
+    def turn_signs(self):
+        # Точный знак поворота в каждой вершине (predicates.orient2d_batch)
+        i1 = self._next_index(1)
+        i2 = self._next_index(2)
+        return orient2d_batch(self.xs, self.ys, self.xs[i1], self.ys[i1], self.xs[i2], self.ys[i2])
+
+    def is_convex(self):
+        # Как predicates.is_convex: нет поворотов в обе стороны сразу
+        signs = self.turn_signs()
+        left = self._reduce(np.maximum, (signs > 0).astype(np.int8), 0)
+        right = self._reduce(np.maximum, (signs < 0).astype(np.int8), 0)
+        return ~((left > 0) & (right > 0))
+
+
+if __name__ == "__main__":
+    polygons = [
+        ((0, 0), (1, 0), (1, 1), (0, 1)),
+        ((0, 0), (2, 0), (1, 3)),
+        ((0, 0), (2, 0), (1, 1), (2, 2), (0, 2)),
+    ]
+    batch = PolygonBatch.from_polygons(polygons)
+    print("Площади:", batch.areas())
+    print("Периметры:", batch.perimeters())
+    print("Минимальные стороны:", batch.min_sides())
+    print("Максимальные стороны:", batch.max_sides())
+    print("Выпуклость:", batch.is_convex())
@@ -0,0 +1,189 @@
+import os
+import struct
+from itertools import islice
+
+import numpy as np
+
+from polygon_batch import PolygonBatch
+
+# Набор полигонов на диске — каталог с файлами:
+#   header       — MAGIC, версия, число полигонов, число вершин, флаги колонок
+#   offsets.i64  — int64, число полигонов + 1 (первое значение 0)
+#   coords.f64   — float64, пары (x, y) подряд
+#   area.f64     — float64, площадь каждого полигона (если FLAG_AREA)
+#   bbox.f64     — float64, (xmin, ymin, xmax, ymax) каждого полигона (если FLAG_BBOX)
+# Запись только дописыванием: сначала колонки, затем заголовок (атомарно через os.replace).
+# Читатель видит ровно столько полигонов, сколько записано в заголовке.
+
+MAGIC = b'POLYDS01'
+VERSION = 1
+HEADER = struct.Struct('<8sIQQI')
+FLAG_AREA = 1
+FLAG_BBOX = 2
+
+
+def _read_header(path):
+    with open(os.path.join(path, 'header'), 'rb') as f:
+        magic, version, n_polygons, n_vertices, flags = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a polygon dataset")
+    if version != VERSION:
+        raise ValueError(f"unsupported polygon dataset version {version}")
+    return n_polygons, n_vertices, flags
+
+
+def _write_header(path, n_polygons, n_vertices, flags):
+    tmp = os.path.join(path, 'header.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, n_polygons, n_vertices, flags))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(path, 'header'))
+
+
+def _map(path, name, count, shape=()):
+    # memmap без копирования; пустой файл отображать нельзя — отдаём пустой массив
+    dtype = np.int64 if name.endswith('.i64') else np.float64
+    if count == 0:
+        return np.zeros((0,) + shape, dtype=dtype)
+    return np.memmap(os.path.join(path, name), dtype=dtype, mode='r', shape=(count,) + shape)
+
+
+class PolygonDataset:
+    '''Открытый набор полигонов: колонки отображены в память через numpy.memmap.
+
+    Открытие не читает данные. ds[i] — кортеж вершин, ds[a:b] и batch() —
+    PolygonBatch поверх отображённых массивов без копирования; batch() строится
+    один раз и смещения не перепроверяет (их записал append_polygons). При
+    передаче в другой процесс (pickle) передаётся только путь, файл
+    открывается заново.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.n_polygons, self.n_vertices, self.flags = _read_header(path)
+        self.offsets = _map(path, 'offsets.i64', self.n_polygons + 1)
+        self.coords = _map(path, 'coords.f64', self.n_vertices, (2,))
+        self.area = _map(path, 'area.f64', self.n_polygons) if self.flags & FLAG_AREA else None
+        self.bbox = _map(path, 'bbox.f64', self.n_polygons, (4,)) if self.flags & FLAG_BBOX else None
+        self._batch = None
+
+    def __reduce__(self):
+        return (PolygonDataset, (self.path,))
+
+    def __len__(self):
+        return self.n_polygons
+
+    def batch(self):
+        if self._batch is None:
+            self._batch = PolygonBatch(self.coords[:, 0], self.coords[:, 1], self.offsets, validate=False)
+        return self._batch
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.batch()[i]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("polygon index out of range")
+        return tuple(map(tuple, self.coords[self.offsets[i]:self.offsets[i + 1]].tolist()))
+
+    def __iter__(self):
+        # по пачкам, чтобы в память не поднимался весь файл
+        batch = self.batch()
+        for lo in range(0, len(self), 65536):
+            yield from batch[lo:lo + 65536]
+
+    def areas(self):
+        return self.area if self.area is not None else self.batch().areas()
+
+    def bboxes(self):
+        return self.bbox if self.bbox is not None else self.batch().bboxes()
+
+
+def create_dataset(path, area=True, bbox=True):
+    os.makedirs(path, exist_ok=True)
+    for name in ('offsets.i64', 'coords.f64', 'area.f64', 'bbox.f64'):
+        open(os.path.join(path, name), 'wb').close()
+    with open(os.path.join(path, 'offsets.i64'), 'wb') as f:
+        f.write(np.zeros(1, dtype=np.int64).tobytes())
+    _write_header(path, 0, 0, (FLAG_AREA if area else 0) | (FLAG_BBOX if bbox else 0))
+
+
+def _chunks(polygons, chunk_size):
+    if hasattr(polygons, 'to_batch'):
+        polygons = polygons.to_batch()
+    if isinstance(polygons, PolygonBatch):
+        for lo in range(0, len(polygons), chunk_size):
+            yield polygons[lo:lo + chunk_size]
+        return
+    it = iter(polygons)
+    while True:
+        batch = PolygonBatch.from_polygons(islice(it, chunk_size))
+        if not len(batch):
+            return
+        yield batch
+
+
+def append_polygons(path, polygons, chunk_size=65536):
+    '''Дописывает полигоны (итерируемое, PolygonBatch или PolygonStore) в конец набора.
+
+    Возвращает итоговое число полигонов.
+    '''
+    n_polygons, n_vertices, flags = _read_header(path)
+    # хвост от прерванной записи отрезаем по заголовку
+    sizes = {'offsets.i64': (n_polygons + 1) * 8, 'coords.f64': n_vertices * 16,
+             'area.f64': n_polygons * 8 if flags & FLAG_AREA else 0,
+             'bbox.f64': n_polygons * 32 if flags & FLAG_BBOX else 0}
+    for name, size in sizes.items():
+        os.truncate(os.path.join(path, name), size)
+    files = {name: open(os.path.join(path, name), 'ab') for name in sizes}
+    try:
+        for batch in _chunks(polygons, chunk_size):
+            coords = np.column_stack([batch.xs, batch.ys])
+            files['coords.f64'].write(coords.tobytes())
+            files['offsets.i64'].write((batch.offsets[1:] + n_vertices).tobytes())
+            if flags & FLAG_AREA:
+                files['area.f64'].write(batch.areas().tobytes())
+            if flags & FLAG_BBOX:
+                files['bbox.f64'].write(batch.bboxes().tobytes())
+            n_polygons += len(batch)
+            n_vertices += len(batch.xs)
+        for f in files.values():
+            f.flush()
+            os.fsync(f.fileno())
+    finally:
+        for f in files.values():
+            f.close()
+    _write_header(path, n_polygons, n_vertices, flags)
+    return n_polygons
+
+
+def write_dataset(path, polygons, area=True, bbox=True):
+    create_dataset(path, area, bbox)
+    append_polygons(path, polygons)
+    return PolygonDataset(path)
+
+
+def open_dataset(path):
+    return PolygonDataset(path)
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from shape_ribbon import hexagon_ribbon
+
+    path = os.path.join(tempfile.gettempdir(), 'hexagons.polyds')
+    start = time.perf_counter()
+    create_dataset(path)
+    ribbon = hexagon_ribbon()
+    for lo in range(0, 2_000_000, 500_000):
+        append_polygons(path, ribbon[lo:lo + 500_000])
+    print(f"Запись 2 млн шестиугольников: {time.perf_counter() - start:.2f} с")
+
+    start = time.perf_counter()
+    ds = open_dataset(path)
+    print(f"Открытие: {(time.perf_counter() - start) * 1000:.2f} мс, полигонов: {len(ds)}")
+    print("Полигон 1 234 567:", ds[1_234_567])
+    print("Суммарная площадь:", ds.areas().sum())
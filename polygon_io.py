@@ -0,0 +1,164 @@
+import json
+import os
+import re
+from contextlib import contextmanager
+from itertools import islice
+
+from polygon_batch import PolygonBatch
+
+BUFFER_SIZE = 1 << 20
+
+_RING = re.compile(r'\(([^()]*)\)')
+_EMPTY = re.compile(r'POLYGON\s*(?:ZM|Z|M)?\s+EMPTY', re.IGNORECASE)
+
+# Метка размерности после POLYGON -> число координат у точки (0 — определить по данным)
+_DIMS = {'': 0, 'Z': 3, 'M': 3, 'ZM': 4}
+
+
+@contextmanager
+def _open(source, mode):
+    # Путь открываем сами с большим буфером, открытый файл используем как есть
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, mode, buffering=BUFFER_SIZE, encoding='utf-8') as f:
+            yield f
+    else:
+        yield source
+
+
+def _close_ring(points):
+    # В WKT и GeoJSON кольцо замкнуто; в наших полигонах последняя вершина не повторяет первую
+    if len(points) > 1 and points[0] == points[-1]:
+        points = points[:-1]
+    return tuple(points)
+
+
+def parse_wkt(line):
+    '''POLYGON ((x y, x y, ...)) -> кортеж вершин. Берётся только внешнее кольцо.
+
+    POLYGON Z / M / ZM (и трёх-четырёхмерные точки без метки) тоже читаются:
+    лишние координаты z и m отбрасываются. POLYGON EMPTY даёт None —
+    read_wkt такие строки пропускает, как parse_geojson геометрию null.
+    '''
+    text = line.strip()
+    if not text.upper().startswith('POLYGON'):
+        raise ValueError(f"not a WKT polygon: {text[:40]!r}")
+    if _EMPTY.fullmatch(text):
+        return None
+    ring = _RING.search(text)
+    if ring is None:
+        raise ValueError(f"malformed WKT polygon: {text[:40]!r}")
+    tag = text[len('POLYGON'):text.find('(')].strip().upper()
+    if tag not in _DIMS:
+        raise ValueError(f"malformed WKT polygon: {text[:40]!r}")
+    coords = ring.group(1)
+    values = list(map(float, coords.replace(',', ' ').split()))
+    points = coords.count(',') + 1
+    # размерность — из метки, а без неё — по числу чисел на точку
+    dims = _DIMS[tag] or len(values) // points
+    if dims not in (2, 3, 4) or len(values) != dims * points:
+        raise ValueError(f"malformed WKT polygon: {text[:40]!r}")
+    return _close_ring(list(zip(values[0::dims], values[1::dims])))
+
+
+def format_wkt(polygon):
+    points = list(polygon)
+    if points:
+        points.append(points[0])
+    return 'POLYGON ((' + ', '.join(f'{float(x)!r} {float(y)!r}' for x, y in points) + '))'
+
+
+def parse_geojson(line):
+    '''Feature или геометрия Polygon/MultiPolygon -> список полигонов (внешние кольца).
+
+    Feature без геометрии ("geometry": null) и пустые полигоны (без колец) дают пустой список.
+    '''
+    obj = json.loads(line)
+    geometry = obj.get('geometry') if obj.get('type') == 'Feature' else obj
+    if geometry is None:
+        return []
+    if geometry['type'] == 'Polygon':
+        rings = geometry['coordinates'][:1]
+    elif geometry['type'] == 'MultiPolygon':
+        rings = [part[0] for part in geometry['coordinates'] if part]
+    else:
+        raise ValueError(f"unsupported geometry type {geometry['type']!r}")
+    return [_close_ring([tuple(p[:2]) for p in ring]) for ring in rings]
+
+
+def format_geojson(polygon):
+    # Строка собирается напрямую: json.dumps на каждый полигон заметно медленнее
+    points = list(polygon)
+    if points:
+        points.append(points[0])
+    coords = ', '.join(f'[{float(x)!r}, {float(y)!r}]' for x, y in points)
+    return ('{"type": "Feature", "properties": {}, '
+            '"geometry": {"type": "Polygon", "coordinates": [[' + coords + ']]}}')
+
+
+def read_wkt(source):
+    '''Полигоны из файла WKT, по одному POLYGON на строку. Генератор: файл читается потоково.'''
+    with _open(source, 'r') as f:
+        for line in f:
+            if line.strip():
+                polygon = parse_wkt(line)
+                if polygon is not None:
+                    yield polygon
+
+
+def read_geojson(source):
+    '''Полигоны из GeoJSON Lines (по одному Feature или геометрии на строку).'''
+    with _open(source, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield from parse_geojson(line)
+
+
+def read_chunks(polygons, chunk_size=65536):
+    # Поток полигонов -> поток PolygonBatch по chunk_size штук
+    it = iter(polygons)
+    while True:
+        batch = PolygonBatch.from_polygons(islice(it, chunk_size))
+        if not len(batch):
+            return
+        yield batch
+
+
+def _write(polygons, dest, formatter, chunk_size):
+    count = 0
+    with _open(dest, 'w') as f:
+        it = iter(polygons)
+        while True:
+            chunk = list(islice(it, chunk_size))
+            if not chunk:
+                break
+            f.write('\n'.join(map(formatter, chunk)))
+            f.write('\n')
+            count += len(chunk)
+    return count
+
+
+def write_wkt(polygons, dest, chunk_size=4096):
+    '''Пишет полигоны в WKT по мере поступления, пачками по chunk_size строк. Возвращает их число.'''
+    return _write(polygons, dest, format_wkt, chunk_size)
+
+
+def write_geojson(polygons, dest, chunk_size=4096):
+    '''То же для GeoJSON Lines.'''
+    return _write(polygons, dest, format_geojson, chunk_size)
+
+
+if __name__ == "__main__":
+    import math
+    import tempfile
+    import time
+    from affine import TransformChain
+    from shape_ribbon import hexagon_ribbon
+
+    src = os.path.join(tempfile.gettempdir(), 'hexagons.wkt')
+    dst = os.path.join(tempfile.gettempdir(), 'hexagons.geojsonl')
+    start = time.perf_counter()
+    write_wkt(iter(hexagon_ribbon()[:200_000]), src)
+    # файл -> поворот -> файл, в памяти одновременно только одна пачка
+    polygons = TransformChain(read_wkt(src)).rotate(math.radians(30))
+    n = write_geojson(polygons, dst)
+    print(f"{n} полигонов: WKT -> поворот -> GeoJSON за {time.perf_counter() - start:.1f} с")
@@ -0,0 +1,162 @@
+import numpy as np
+
+from polygon_batch import PolygonBatch
+
+
+class PolygonView:
+    '''Лёгкий полигон из PolygonStore: ведёт себя как кортеж пар (x, y).
+
+    Поддерживает len, индексацию, перебор, сравнение и хеширование по содержимому,
+    поэтому подходит для flt_*, tr_* и agr_* без изменений.
+    '''
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def _coords(self):
+        offsets = self.store.offsets
+        return self.store.buffer[offsets[self.index]:offsets[self.index + 1]]
+
+    def __len__(self):
+        offsets = self.store.offsets
+        return int(offsets[self.index + 1] - offsets[self.index])
+
+    def __getitem__(self, i):
+        coords = self._coords()
+        if isinstance(i, slice):
+            return tuple(map(tuple, coords[i].tolist()))
+        x, y = coords[i].tolist()
+        return (x, y)
+
+    def __iter__(self):
+        return iter(map(tuple, self._coords().tolist()))
+
+    def __array__(self, dtype=None, copy=None):
+        # Без копии отдаётся представление буфера только для чтения: запись
+        # в результат np.asarray(view) не должна менять хранилище
+        coords = self._coords()
+        if dtype is not None and np.dtype(dtype) != coords.dtype:
+            if copy is False:
+                raise ValueError("converting the dtype requires a copy")
+            return coords.astype(dtype)
+        if copy:
+            return coords.copy()
+        coords = coords.view()
+        coords.flags.writeable = False
+        return coords
+
+    def __eq__(self, other):
+        try:
+            return tuple(self) == tuple(map(tuple, other))
+        except TypeError:
+            return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return repr(tuple(self))
+
+
+class PolygonStore:
+    '''Полигоны в одном непрерывном буфере float64 формы (вершины, 2) плюс массив смещений.
+
+    Буфер растёт удвоением, так что append в среднем O(число вершин).
+    Элементы — PolygonView; to_batch() отдаёт PolygonBatch без копирования.
+    '''
+
+    def __init__(self, polygons=(), capacity=1024):
+        self.buffer = np.empty((capacity, 2), dtype=np.float64)
+        self.offsets = np.zeros(max(capacity // 4, 1) + 1, dtype=np.int64)
+        self.count = 0
+        self.extend(polygons)
+
+    @property
+    def vertex_count(self):
+        return int(self.offsets[self.count])
+
+    def _reserve(self, vertices, polygons):
+        need = self.vertex_count + vertices
+        if need > len(self.buffer):
+            buffer = np.empty((max(need, 2 * len(self.buffer)), 2), dtype=np.float64)
+            buffer[:self.vertex_count] = self.buffer[:self.vertex_count]
+            self.buffer = buffer
+        need = self.count + polygons + 1
+        if need > len(self.offsets):
+            offsets = np.zeros(max(need, 2 * len(self.offsets)), dtype=np.int64)
+            offsets[:self.count + 1] = self.offsets[:self.count + 1]
+            self.offsets = offsets
+
+    def append(self, polygon):
+        coords = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+        self._reserve(len(coords), 1)
+        start = self.vertex_count
+        self.buffer[start:start + len(coords)] = coords
+        self.offsets[self.count + 1] = start + len(coords)
+        self.count += 1
+
+    def extend(self, polygons):
+        if isinstance(polygons, PolygonBatch):
+            self._reserve(len(polygons.xs), len(polygons))
+            start = self.vertex_count
+            self.buffer[start:start + len(polygons.xs), 0] = polygons.xs
+            self.buffer[start:start + len(polygons.xs), 1] = polygons.ys
+            self.offsets[self.count + 1:self.count + len(polygons) + 1] = polygons.offsets[1:] + start
+            self.count += len(polygons)
+            return
+        for polygon in polygons:
+            self.append(polygon)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [PolygonView(self, j) for j in range(*i.indices(self.count))]
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("polygon index out of range")
+        return PolygonView(self, i)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield PolygonView(self, i)
+
+    def to_batch(self):
+        coords = self.buffer[:self.vertex_count]
+        return PolygonBatch(coords[:, 0], coords[:, 1], self.offsets[:self.count + 1])
+
+    def nbytes(self):
+        # Занятая часть буферов
+        return self.vertex_count * 2 * 8 + (self.count + 1) * 8
+
+
+def memory_comparison(polygons):
+    '''Сколько байт занимают те же полигоны как кортежи кортежей и как PolygonStore (замер tracemalloc).'''
+    import tracemalloc
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    tuples = [tuple((float(x), float(y)) for x, y in p) for p in polygons]
+    tuples_bytes = tracemalloc.get_traced_memory()[0] - base
+    del tuples
+    base = tracemalloc.get_traced_memory()[0]
+    store = PolygonStore(polygons, capacity=16)
+    store_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return {'tuples': tuples_bytes, 'store': store_bytes, 'store_used': store.nbytes(),
+            'ratio': tuples_bytes / store_bytes}
+
+
+if __name__ == "__main__":
+    from shape_ribbon import hexagon_ribbon
+
+    polygons = hexagon_ribbon()[:200_000]
+    report = memory_comparison(polygons)
+    print(f"Кортежи: {report['tuples'] / 2**20:.1f} МБ")
+    print(f"PolygonStore: {report['store'] / 2**20:.1f} МБ (занято {report['store_used'] / 2**20:.1f} МБ)")
+    print(f"Экономия: {report['ratio']:.1f}x")
@@ -0,0 +1,186 @@
+from fractions import Fraction
+
+import numpy as np
+
+# Адаптивные предикаты по Шевчуку: сначала обычное вычисление в float64 и оценка
+# его погрешности; если результат по модулю больше оценки, знак верен. Иначе
+# (точки почти на одной прямой или окружности) знак пересчитывается точно в Fraction.
+# Входные координаты считаются точными числами float64.
+
+EPSILON = 2.0 ** -53
+CCW_ERRBOUND = (3.0 + 16.0 * EPSILON) * EPSILON
+ICC_ERRBOUND = (10.0 + 96.0 * EPSILON) * EPSILON
+
+
+def _sign(x):
+    return (x > 0) - (x < 0)
+
+
+def orient2d_exact(a, b, c):
+    ax, ay, bx, by, cx, cy = map(Fraction, (a[0], a[1], b[0], b[1], c[0], c[1]))
+    return _sign((ax - cx) * (by - cy) - (ay - cy) * (bx - cx))
+
+
+def orient2d(a, b, c):
+    '''Знак поворота a -> b -> c: 1 — против часовой стрелки, -1 — по часовой, 0 — точки на одной прямой.
+
+    Совпадает по знаку с cross(a, b, c) из 5.py и 7.py, но всегда точен.
+    '''
+    detleft = (a[0] - c[0]) * (b[1] - c[1])
+    detright = (a[1] - c[1]) * (b[0] - c[0])
+    det = detleft - detright
+    # знаки произведений точны: если одно из них нулевое, знак det тоже точен
+    if not detleft or not detright:
+        return _sign(det)
+    bound = CCW_ERRBOUND * (abs(detleft) + abs(detright))
+    if det > bound:
+        return 1
+    if -det > bound:
+        return -1
+    return orient2d_exact(a, b, c)
+
+
+def incircle_exact(a, b, c, d):
+    ax, ay, bx, by, cx, cy, dx, dy = map(Fraction, (a[0], a[1], b[0], b[1], c[0], c[1], d[0], d[1]))
+    adx, ady, bdx, bdy, cdx, cdy = ax - dx, ay - dy, bx - dx, by - dy, cx - dx, cy - dy
+    det = ((adx * adx + ady * ady) * (bdx * cdy - cdx * bdy)
+           + (bdx * bdx + bdy * bdy) * (cdx * ady - adx * cdy)
+           + (cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady))
+    return _sign(det)
+
+
+def _incircle_float(adx, ady, bdx, bdy, cdx, cdy):
+    # Определитель и оценка погрешности; работает и для чисел, и для массивов numpy
+    bdxcdy, cdxbdy = bdx * cdy, cdx * bdy
+    cdxady, adxcdy = cdx * ady, adx * cdy
+    adxbdy, bdxady = adx * bdy, bdx * ady
+    alift = adx * adx + ady * ady
+    blift = bdx * bdx + bdy * bdy
+    clift = cdx * cdx + cdy * cdy
+    det = alift * (bdxcdy - cdxbdy) + blift * (cdxady - adxcdy) + clift * (adxbdy - bdxady)
+    permanent = ((abs(bdxcdy) + abs(cdxbdy)) * alift
+                 + (abs(cdxady) + abs(adxcdy)) * blift
+                 + (abs(adxbdy) + abs(bdxady)) * clift)
+    return det, ICC_ERRBOUND * permanent
+
+
+def incircle(a, b, c, d):
+    '''Положение d относительно окружности через a, b, c (обход против часовой стрелки).
+
+    1 — внутри, -1 — снаружи, 0 — на окружности. Для обхода по часовой знак обратный.
+    '''
+    det, bound = _incircle_float(a[0] - d[0], a[1] - d[1], b[0] - d[0], b[1] - d[1], c[0] - d[0], c[1] - d[1])
+    if det > bound or -det > bound:
+        return 1 if det > 0 else -1
+    return incircle_exact(a, b, c, d)
+
+
+def orient2d_det(ax, ay, bx, by, cx, cy):
+    '''Определители orient2d для массивов одинаковой формы, с гарантированно верным знаком.
+
+    Значения — обычные float; там, где оценка погрешности не даёт гарантии, они
+    заменены точным знаком (-1, 0 или 1). Промежуточные массивы переиспользуются:
+    функция стоит в горячем цикле point_in_polygon.
+    '''
+    detleft = np.subtract(ax, cx, dtype=np.float64)
+    detleft *= np.subtract(by, cy, dtype=np.float64)
+    detright = np.subtract(ay, cy, dtype=np.float64)
+    detright *= np.subtract(bx, cx, dtype=np.float64)
+    det = detleft - detright
+    bound = np.abs(detleft, out=detleft)
+    bound += np.abs(detright, out=detright)
+    bound *= CCW_ERRBOUND
+    doubtful = np.flatnonzero(np.abs(det, out=detright) <= bound)
+    if len(doubtful):
+        ax, ay, bx, by, cx, cy = (np.broadcast_to(v, det.shape).ravel()[doubtful] for v in (ax, ay, bx, by, cx, cy))
+        # совпадающие точки (вырожденные стороны) дают точный ноль
+        same = (((ax == bx) & (ay == by)) | ((bx == cx) & (by == cy)) | ((ax == cx) & (ay == cy)))
+        det.flat[doubtful[same]] = 0.0
+        # нулевое произведение даёт точный знак и пересчёта не требует
+        exact = ~same & ((ax - cx) * (by - cy) != 0) & ((ay - cy) * (bx - cx) != 0)
+        for j in np.flatnonzero(exact).tolist():
+            det.flat[doubtful[j]] = orient2d_exact((ax[j], ay[j]), (bx[j], by[j]), (cx[j], cy[j]))
+    return det
+
+
+def orient2d_batch(ax, ay, bx, by, cx, cy):
+    '''orient2d для массивов координат: int8-массив знаков.
+
+    Точный пересчёт идёт только для элементов, где float-оценка не даёт гарантии.
+    '''
+    return np.sign(orient2d_det(ax, ay, bx, by, cx, cy)).astype(np.int8)
+
+
+def incircle_batch(ax, ay, bx, by, cx, cy, dx, dy):
+    '''incircle для массивов координат: int8-массив знаков.'''
+    arrays = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (ax, ay, bx, by, cx, cy, dx, dy)))
+    ax, ay, bx, by, cx, cy, dx, dy = arrays
+    det, bound = _incircle_float(ax - dx, ay - dy, bx - dx, by - dy, cx - dx, cy - dy)
+    signs = np.sign(det).astype(np.int8)
+    for i in np.flatnonzero(np.abs(det) <= bound).tolist():
+        a, b, c, d = ((ax.flat[i], ay.flat[i]), (bx.flat[i], by.flat[i]),
+                      (cx.flat[i], cy.flat[i]), (dx.flat[i], dy.flat[i]))
+        signs.flat[i] = incircle_exact(a, b, c, d)
+    return signs
+
+
+def is_convex(polygon):
+    '''Выпуклость по точным знакам поворотов: все ненулевые повороты в одну сторону.
+
+    Вершины на одной прямой с соседями (нулевой поворот) выпуклость не нарушают.
+    orient2d встроен в цикл: функция вызывается на каждый полигон в фильтрах.
+    '''
+    points = list(polygon)
+    left = right = False
+    for (ax, ay), (bx, by), (cx, cy) in zip(points, points[1:] + points[:1], points[2:] + points[:2]):
+        detleft = (ax - cx) * (by - cy)
+        detright = (ay - cy) * (bx - cx)
+        det = detleft - detright
+        if detleft and detright and abs(det) <= CCW_ERRBOUND * (abs(detleft) + abs(detright)):
+            det = orient2d_exact((ax, ay), (bx, by), (cx, cy))
+        if det > 0:
+            left = True
+        elif det < 0:
+            right = True
+    return not (left and right)
+
+
+def is_simple_convex(polygon):
+    '''Выпуклый и простой контур: повороты в одну сторону и ровно один оборот.
+
+    is_convex смотрит только на знаки поворотов и пропускает самопересекающиеся
+    звёзды (пентаграмма поворачивает всё время в одну сторону, но обходит
+    центр дважды), а также вырожденные контуры нулевой площади. Теорема о
+    разделяющей оси верна только для настоящих выпуклых многоугольников.
+
+    Обороты считаются без тригонометрии: направление стороны, поворачиваясь
+    всё время в одну сторону и меньше чем на пол-оборота за шаг, переходит
+    из нижней полуплоскости в верхнюю ровно один раз за оборот. Полуплоскость
+    определяется знаками разностей координат, а они в float точны.
+    '''
+    points = [tuple(p) for p in polygon]
+    # повторяющиеся подряд вершины — стороны нулевой длины, поворота у них нет
+    points = [p for p, q in zip(points, points[1:] + points[:1]) if p != q]
+    if len(points) < 3:
+        return False
+    left = right = False
+    turns = 0
+    for a, b, c in zip(points, points[1:] + points[:1], points[2:] + points[:2]):
+        ux, uy = b[0] - a[0], b[1] - a[1]
+        vx, vy = c[0] - b[0], c[1] - b[1]
+        detleft = (a[0] - c[0]) * (b[1] - c[1])
+        detright = (a[1] - c[1]) * (b[0] - c[0])
+        det = detleft - detright
+        if detleft and detright and abs(det) <= CCW_ERRBOUND * (abs(detleft) + abs(detright)):
+            det = orient2d_exact(a, b, c)
+        if det > 0:
+            left = True
+        elif det < 0:
+            right = True
+        elif ux * vx + uy * vy < 0:
+            # разворот назад по той же прямой
+            return False
+        lower = uy < 0 or (uy == 0 and ux < 0)
+        upper = vy > 0 or (vy == 0 and vx > 0)
+        turns += lower and upper
+    return not (left and right) and turns == 1
@@ -0,0 +1,135 @@
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from polygon_batch import PolygonBatch
+
+# Активный профиль или None. Инструментированный код проверяет только эту
+# переменную, поэтому выключенное профилирование почти ничего не стоит.
+_active = None
+
+
+class StageStats:
+    '''Сводка по одному шагу: сколько полигонов вошло и вышло, время и число вершин на входе.'''
+
+    __slots__ = ('pipeline', 'stage', 'kind', 'calls', 'polygons_in', 'polygons_out', 'vertices', 'seconds')
+
+    def __init__(self, pipeline, stage, kind):
+        self.pipeline = pipeline
+        self.stage = stage
+        self.kind = kind
+        self.calls = 0
+        self.polygons_in = 0
+        self.polygons_out = 0
+        self.vertices = 0
+        self.seconds = 0.0
+
+    @property
+    def pass_rate(self):
+        return self.polygons_out / self.polygons_in if self.polygons_in else 1.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class PipelineProfile:
+    '''Собранные за время profile_pipeline() замеры, по шагам в порядке первого появления.'''
+
+    def __init__(self):
+        self.stats = {}
+
+    def record(self, pipeline, stage, kind, polygons_in, polygons_out, vertices, seconds):
+        key = (pipeline, stage, kind)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = StageStats(pipeline, stage, kind)
+        stats.calls += 1
+        stats.polygons_in += polygons_in
+        stats.polygons_out += polygons_out
+        stats.vertices += vertices
+        stats.seconds += seconds
+
+    @property
+    def stages(self):
+        return list(self.stats.values())
+
+    def report(self):
+        # Список словарей — удобно сохранить в JSON или положить в DataFrame
+        return [s.as_dict() for s in self.stats.values()]
+
+    def slowest(self):
+        return max(self.stats.values(), key=lambda s: s.seconds, default=None)
+
+    def __str__(self):
+        lines = ["Профиль конвейеров:"]
+        for s in self.stats.values():
+            lines.append(f"  {s.pipeline} / {s.stage} ({s.kind}): {s.polygons_in} -> {s.polygons_out} полигонов, "
+                         f"{s.vertices} вершин, {s.seconds * 1e3:.2f} мс")
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile_pipeline():
+    '''Включает профилирование на время блока with и отдаёт PipelineProfile.
+
+    Профиль заполняется шагами конвейеров из pipeline.py (декораторы 7.py)
+    и агрегатами, обёрнутыми в profiled. Вложенный блок собирает свой профиль,
+    после выхода снова действует внешний.
+    '''
+    global _active
+    previous = _active
+    _active = profile = PipelineProfile()
+    try:
+        yield profile
+    finally:
+        _active = previous
+
+
+def measure(polygons):
+    # (полигонов, вершин) для списка или PolygonBatch; считается только при включённом профиле
+    if isinstance(polygons, PolygonBatch):
+        return len(polygons), len(polygons.xs)
+    return len(polygons), sum(map(len, polygons))
+
+
+class _Counting:
+    # Обёртка над потоком полигонов, которая считает их и их вершины по ходу перебора
+    def __init__(self, polygons):
+        self.polygons = polygons
+        self.count = 0
+        self.vertices = 0
+
+    def __iter__(self):
+        for p in self.polygons:
+            self.count += 1
+            self.vertices += len(p)
+            yield p
+
+
+def profiled(name=None, kind='aggregate'):
+    '''Декоратор для функций вида f(polygons, ...) -> результат, например agr_* из 8.py.
+
+    При включённом профиле записывает шаг с одним «выходом» — результатом.
+    Списки и PolygonBatch передаются как есть, поток оборачивается в счётчик.
+    '''
+    def decorator(func):
+        label = name or func.__name__
+        @wraps(func)
+        def wrapper(polygons, *args, **kwargs):
+            profile = _active
+            if profile is None:
+                return func(polygons, *args, **kwargs)
+            if isinstance(polygons, (list, tuple, PolygonBatch)):
+                counter = None
+                count, vertices = measure(polygons)
+            else:
+                counter = polygons = _Counting(polygons)
+            start = time.perf_counter()
+            result = func(polygons, *args, **kwargs)
+            seconds = time.perf_counter() - start
+            if counter is not None:
+                count, vertices = counter.count, counter.vertices
+            profile.record(label, label, kind, count, 1, vertices, seconds)
+            return result
+        return wrapper
+    return decorator
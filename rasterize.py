@@ -0,0 +1,195 @@
+import numpy as np
+
+from polygon_batch import PolygonBatch
+
+
+def _as_batch(polygons):
+    return polygons if isinstance(polygons, PolygonBatch) else PolygonBatch.from_polygons(polygons)
+
+
+class Raster:
+    '''Заливка полигонов в NumPy-массив построчным сканированием, без графических библиотек.
+
+    viewport = (xmin, ymin, xmax, ymax), shape = (высота, ширина); строка 0 — верх.
+    Пиксель закрашивается, если его центр лежит внутри полигона.
+    rule: 'evenodd' или 'nonzero'. mode:
+      'count' — сколько полигонов покрывает пиксель;
+      'max'   — максимум значений values покрывающих полигонов (фон — -inf);
+      'last'  — номер последнего добавленного полигона, покрывающего пиксель (фон — -1).
+    add() можно вызывать много раз, например для каждой пачки из Tessellation.chunks().
+    '''
+
+    def __init__(self, viewport, shape, rule='evenodd', mode='count', budget=4_000_000):
+        if rule not in ('evenodd', 'nonzero'):
+            raise ValueError("rule must be 'evenodd' or 'nonzero'")
+        if mode not in ('count', 'max', 'last'):
+            raise ValueError("mode must be 'count', 'max' or 'last'")
+        self.viewport = tuple(float(v) for v in viewport)
+        self.shape = tuple(shape)
+        self.rule = rule
+        self.mode = mode
+        self.budget = budget
+        self.added = 0
+        if mode == 'count':
+            self.image = np.zeros(self.shape, dtype=np.int64)
+        elif mode == 'max':
+            self.image = np.full(self.shape, -np.inf)
+        else:
+            self.image = np.full(self.shape, -1, dtype=np.int64)
+
+    def _spans(self, batch):
+        # Отрезки закраски: (номер полигона, строка, первый столбец, столбец после последнего)
+        xmin, ymin, xmax, ymax = self.viewport
+        h, w = self.shape
+        # координаты в пикселях: целые значения — центры пикселей
+        fx = (batch.xs - xmin) * (w / (xmax - xmin)) - 0.5
+        fy = (ymax - batch.ys) * (h / (ymax - ymin)) - 0.5
+        nxt = batch._next_index()
+        x1, y1, x2, y2 = fx, fy, fx[nxt], fy[nxt]
+        poly = batch.polygon_ids()
+        keep = y1 != y2
+        x1, y1, x2, y2, poly = x1[keep], y1[keep], x2[keep], y2[keep], poly[keep]
+        direction = np.where(y2 > y1, 1, -1)
+        # строки, центры которых попадают в полуинтервал [min(y), max(y))
+        r0 = np.clip(np.ceil(np.minimum(y1, y2)), 0, h).astype(np.int64)
+        r1 = np.clip(np.ceil(np.maximum(y1, y2)), 0, h).astype(np.int64)
+        rows = r1 - r0
+        e = np.repeat(np.arange(len(x1)), rows)
+        row = np.repeat(r0, rows) + np.arange(rows.sum()) - np.repeat(np.cumsum(rows) - rows, rows)
+        x = x1[e] + (row - y1[e]) * (x2[e] - x1[e]) / (y2[e] - y1[e])
+        p = poly[e]
+        if not len(x):
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty, empty
+        order = np.lexsort((x, row, p))
+        x, row, p, d = x[order], row[order], p[order], direction[e][order]
+        same = (p[1:] == p[:-1]) & (row[1:] == row[:-1])
+        if self.rule == 'evenodd':
+            # номер пересечения внутри группы (полигон, строка): после нечётного мы внутри
+            starts = np.flatnonzero(np.concatenate([[True], ~same]))
+            k = np.arange(len(x)) - np.repeat(starts, np.diff(np.append(starts, len(x))))
+            inside = k % 2 == 0
+        else:
+            wind = np.cumsum(d)
+            group_start = np.concatenate([[True], ~same])
+            base = np.maximum.accumulate(np.where(group_start, np.arange(len(x)), 0))
+            wind = wind - (np.cumsum(d) - d)[base]
+            inside = wind != 0
+        fill = inside[:-1] & same
+        c0 = np.clip(np.ceil(x[:-1][fill]), 0, w).astype(np.int64)
+        c1 = np.clip(np.ceil(x[1:][fill]), 0, w).astype(np.int64)
+        nonempty = c1 > c0
+        return p[:-1][fill][nonempty], row[:-1][fill][nonempty], c0[nonempty], c1[nonempty]
+
+    def _chunks(self, batch):
+        # Пачки полигонов, в каждой примерно budget пар «сторона-строка»
+        _, ymin, _, ymax = self.viewport
+        h = self.shape[0]
+        bboxes = batch.bboxes()
+        heights = np.nan_to_num((bboxes[:, 3] - bboxes[:, 1]) * (h / (ymax - ymin)))
+        work = np.cumsum((np.minimum(heights, h) + 1) * batch.counts())
+        if not len(work):
+            return
+        bounds = np.searchsorted(work, np.arange(self.budget, work[-1], self.budget), side='right')
+        bounds = np.unique(np.concatenate([[0], bounds, [len(batch)]]))
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            yield a, batch[a:b]
+
+    def add(self, polygons, values=None):
+        batch = _as_batch(polygons)
+        if values is not None:
+            values = np.asarray(values, dtype=np.float64)
+        for a, chunk in self._chunks(batch):
+            p, row, c0, c1 = self._spans(chunk)
+            if self.mode == 'count':
+                diff = np.zeros((self.shape[0], self.shape[1] + 1), dtype=np.int64)
+                np.add.at(diff, (row, c0), 1)
+                np.add.at(diff, (row, c1), -1)
+                self.image += np.cumsum(diff, axis=1)[:, :-1]
+                continue
+            length = c1 - c0
+            pix_row = np.repeat(row, length)
+            pix_col = np.repeat(c0, length) + np.arange(length.sum()) - np.repeat(np.cumsum(length) - length, length)
+            flat = pix_row * self.shape[1] + pix_col
+            if self.mode == 'last':
+                vals = np.repeat(p + a + self.added, length)
+            else:
+                vals = np.repeat(values[p + a] if values is not None else p + a + self.added, length)
+            np.maximum.at(self.image.reshape(-1), flat, vals.astype(self.image.dtype))
+        self.added += len(batch)
+        return self
+
+
+def rasterize(polygons, viewport, shape, rule='evenodd', mode='count', values=None):
+    return Raster(viewport, shape, rule, mode).add(polygons, values).image
+
+
+def rasterize_tiles(polygons, viewport, shape, tile_size=1024, rule='evenodd', mode='count', values=None):
+    '''Большое изображение по плиткам tile_size x tile_size.
+
+    Для каждой плитки растеризуются только полигоны, чей bbox её задевает.
+    Отдаёт (строка, столбец верхнего левого пикселя плитки, массив плитки).
+    '''
+    batch = _as_batch(polygons)
+    bboxes = batch.bboxes()
+    xmin, ymin, xmax, ymax = viewport
+    h, w = shape
+    px = (xmax - xmin) / w
+    py = (ymax - ymin) / h
+    for r in range(0, h, tile_size):
+        for c in range(0, w, tile_size):
+            th, tw = min(tile_size, h - r), min(tile_size, w - c)
+            tile = (xmin + c * px, ymax - (r + th) * py, xmin + (c + tw) * px, ymax - r * py)
+            hit = ((bboxes[:, 0] <= tile[2]) & (bboxes[:, 2] >= tile[0])
+                   & (bboxes[:, 1] <= tile[3]) & (bboxes[:, 3] >= tile[1]))
+            ids = np.flatnonzero(hit)
+            tile_values = None if values is None else np.asarray(values)[ids]
+            image = Raster(tile, (th, tw), rule, mode).add(batch.take(ids), tile_values).image
+            if mode == 'last' or (mode == 'max' and values is None):
+                # номера полигонов в плитке переводим в общие
+                covered = image >= 0
+                image[covered] = ids[image[covered].astype(np.int64)]
+            yield r, c, image
+
+
+def matplotlib_coverage(polygons, viewport, shape):
+    # Та же заливка через Matplotlib (Agg, без сглаживания) — для сверки с Raster
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from render import draw_polygons
+
+    h, w = shape
+    fig = Figure(figsize=(w / 100, h / 100), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.set_axis_off()
+    ax.set_xlim(viewport[0], viewport[2])
+    ax.set_ylim(viewport[1], viewport[3])
+    collection = draw_polygons(ax, polygons, edgecolor='none', facecolor='black', lw=0)
+    collection.set_antialiased(False)
+    canvas.draw()
+    rgba = np.asarray(canvas.buffer_rgba())
+    return rgba[..., 0] < 128
+
+
+def compare_with_matplotlib(polygons, viewport, shape, rule='nonzero'):
+    # Доля пикселей, где покрытие Raster и Matplotlib расходится
+    ours = rasterize(polygons, viewport, shape, rule=rule, mode='count') > 0
+    theirs = matplotlib_coverage(polygons, viewport, shape)
+    return float(np.mean(ours != theirs))
+
+
+if __name__ == "__main__":
+    import time
+    from shape_ribbon import hexagon_ribbon
+    from tessellation import parallel_bands
+
+    layout = parallel_bands([hexagon_ribbon(), hexagon_ribbon(gap=0.1)], 0.3, 2.0, indices=range(0, 1_000_000))
+    raster = Raster((0, -2, 400, 200), (1000, 2000), mode='count')
+    start = time.perf_counter()
+    for band, batch in layout.chunks(200_000):
+        raster.add(batch)
+    print(f"2 млн шестиугольников: {time.perf_counter() - start:.1f} с, закрашено пикселей: {(raster.image > 0).sum()}")
+
+    sample = list(hexagon_ribbon()[:200])
+    print("Расхождение с Matplotlib:", compare_with_matplotlib(sample, (-1, -1, 60, 3), (200, 2000)))
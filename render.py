@@ -0,0 +1,105 @@
+import numpy as np
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from polygon_batch import PolygonBatch
+
+
+def polygon_verts(polygons):
+    '''Вершины для PolyCollection: массив (n, m, 2), если у всех полигонов m вершин, иначе список массивов.
+
+    Без полигонов — пустой список (np.split пустого массива дал бы один пустой полигон).
+    '''
+    if isinstance(polygons, PolygonBatch):
+        batch = polygons
+    else:
+        batch = PolygonBatch.from_polygons(polygons)
+    counts = batch.counts()
+    if not len(counts):
+        return []
+    xy = np.column_stack([batch.xs, batch.ys])
+    if (counts == counts[0]).all():
+        return xy.reshape(len(counts), counts[0], 2)
+    return np.split(xy, batch.offsets[1:-1])
+
+
+def draw_polygons(ax, polygons, edgecolor='black', facecolor='none', lw=1.5, alpha=None,
+                  label=None, numbers=False, fontsize=10):
+    '''Рисует все полигоны одной коллекцией.
+
+    edgecolor и facecolor — один цвет или список цветов по полигонам.
+    label попадает в легенду, numbers подписывает полигоны номерами с 1.
+    '''
+    verts = polygon_verts(polygons)
+    collection = PolyCollection(verts, closed=True, edgecolors=edgecolor, facecolors=facecolor,
+                                linewidths=lw, alpha=alpha, label=label)
+    ax.add_collection(collection)
+    if numbers:
+        for i, v in enumerate(verts):
+            cx, cy = np.mean(v, axis=0)
+            ax.text(cx, cy, str(i + 1), ha='center', va='center', fontsize=fontsize, weight='bold')
+    return collection
+
+
+def cycle_colors(colors, n):
+    return [colors[i % len(colors)] for i in range(n)]
+
+
+def polygons_limits(polygons, margin=1):
+    # (xmin, xmax, ymin, ymax) по всем вершинам с отступом margin
+    verts = polygon_verts(polygons)
+    if not len(verts):
+        # пустой набор: окно вокруг начала координат
+        return -margin, margin, -margin, margin
+    xy = verts.reshape(-1, 2) if isinstance(verts, np.ndarray) else np.concatenate(verts)
+    (xmin, ymin), (xmax, ymax) = xy.min(axis=0), xy.max(axis=0)
+    return xmin - margin, xmax + margin, ymin - margin, ymax + margin
+
+
+def new_figure(figsize=(8, 8), path=None, nrows=1, ncols=1):
+    '''Фигура и оси. Если задан path, фигура создаётся без pyplot на бэкенде Agg,
+    так что работает без дисплея.'''
+    if path is None:
+        import matplotlib.pyplot as plt
+        return plt.subplots(nrows, ncols, figsize=figsize)
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots(nrows, ncols)
+
+
+def finish_figure(fig, path=None, dpi=100):
+    # Сохраняет в файл (формат по расширению: .png, .svg, ...) или показывает окно
+    if path is None:
+        import matplotlib.pyplot as plt
+        plt.show()
+    else:
+        fig.savefig(path, dpi=dpi)
+
+
+def render_polygons(polygons, path=None, title=None, figsize=(8, 8), margin=1, grid=True, **kwargs):
+    '''Рисует набор полигонов одним вызовом; с path пишет PNG/SVG без дисплея.'''
+    if not isinstance(polygons, PolygonBatch):
+        # вход нужен дважды (коллекция и границы осей), генератор читается один раз
+        polygons = PolygonBatch.from_polygons(polygons)
+    fig, ax = new_figure(figsize, path)
+    draw_polygons(ax, polygons, **kwargs)
+    xmin, xmax, ymin, ymax = polygons_limits(polygons, margin)
+    ax.set_xlim(xmin, xmax)
+    ax.set_ylim(ymin, ymax)
+    ax.set_aspect('equal')
+    ax.grid(grid)
+    if title:
+        ax.set_title(title)
+    finish_figure(fig, path)
+    return fig
+
+
+if __name__ == "__main__":
+    import time
+    from shape_ribbon import hexagon_ribbon
+
+    hexes = hexagon_ribbon()[:1_000_000]
+    start = time.perf_counter()
+    render_polygons(hexes, path="hexagons.png", title="1 млн шестиугольников", lw=0.1)
+    print(f"hexagons.png: {time.perf_counter() - start:.1f} с")
@@ -0,0 +1,94 @@
+import math
+from itertools import count, islice
+
+import numpy as np
+
+from polygon_batch import PolygonBatch
+
+
+class ShapeRibbon:
+    '''Бесконечная лента одинаковых фигур с произвольным доступом.
+
+    Фигура i — это template, сдвинутый на origin + i * step, как rectangle_at(i)
+    из 42.py. ribbon[i] возвращает кортеж вершин, ribbon[a:b] — PolygonBatch,
+    который строится одним векторным вызовом без перебора пропущенных фигур.
+    '''
+
+    def __init__(self, template, step, origin=(0, 0)):
+        self.template = np.asarray(template, dtype=np.float64).reshape(-1, 2)
+        self.step = np.asarray(step, dtype=np.float64)
+        self.origin = np.asarray(origin, dtype=np.float64)
+
+    @property
+    def vertex_count(self):
+        return len(self.template)
+
+    def at(self, i):
+        dx, dy = (self.origin + i * self.step).tolist()
+        return tuple((x + dx, y + dy) for x, y in self.template.tolist())
+
+    def coords(self, indices):
+        # Массив вершин формы (len(indices), m, 2)
+        indices = np.asarray(indices, dtype=np.float64)
+        shift = self.origin + indices[:, None] * self.step
+        return self.template[None, :, :] + shift[:, None, :]
+
+    def batch(self, indices):
+        return PolygonBatch.from_array(self.coords(indices))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            if i.stop is None:
+                raise ValueError("ribbon is infinite, slice needs an explicit stop")
+            start = 0 if i.start is None else i.start
+            return self.batch(np.arange(start, i.stop, i.step or 1))
+        return self.at(i)
+
+    def batches(self, size, start=0):
+        # Следующие size фигур одним PolygonBatch, бесконечно
+        for lo in count(start, size):
+            yield self.batch(np.arange(lo, lo + size))
+
+    def __iter__(self):
+        for batch in self.batches(1024):
+            yield from batch
+
+
+def ribbon_from_generator(gen):
+    '''Лента по первым двум фигурам генератора вида gen_rectangle: шаг — их разность.'''
+    first, second = islice(gen, 2)
+    template = np.asarray(first, dtype=np.float64)
+    step = np.asarray(second[0], dtype=np.float64) - template[0]
+    return ShapeRibbon(template, step)
+
+
+# Те же фигуры, что дают генераторы из zadanie2.py
+
+def rectangle_ribbon(start_x=0, side=1, gap=0.3):
+    template = ((0, 0), (0, side), (side, side), (side, 0))
+    return ShapeRibbon(template, (side + gap, 0), (start_x, 0))
+
+
+def triangle_ribbon(start_x=0, side=1, gap=0.3):
+    height = math.sqrt(3)/2 * side
+    template = ((0, 0), (side/2, height), (side, 0))
+    return ShapeRibbon(template, (side + gap, 0), (start_x, 0))
+
+
+def hexagon_ribbon(start_x=0, side=0.577, gap=0.3):
+    angle_step = math.pi / 3
+    width = 2 * side * math.cos(math.pi / 6)
+    points = [(side * math.cos(angle_step * i), side * math.sin(angle_step * i)) for i in range(6)]
+    min_y = min(p[1] for p in points)
+    template = [(px, py - min_y) for px, py in points]
+    return ShapeRibbon(template, (width + gap, 0), (start_x, 0))
+
+
+if __name__ == "__main__":
+    import time
+
+    rects = rectangle_ribbon()
+    print("Фигура 10 000 000:", rects[10_000_000])
+    start = time.perf_counter()
+    batch = hexagon_ribbon()[:1_000_000]
+    print(f"1 млн шестиугольников: {time.perf_counter() - start:.2f} с, площадь первого {batch.areas()[0]:.4f}")
@@ -0,0 +1,92 @@
+import math
+from collections import defaultdict
+
+
+def polygon_bbox(polygon):
+    xs = [p[0] for p in polygon]
+    ys = [p[1] for p in polygon]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def bboxes_overlap(a, b):
+    # Касание границ тоже считается пересечением, как в shapely intersects
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def median_cell_size(bboxes):
+    # Медиана наибольшей стороны bbox: типичный объект занимает одну-четыре ячейки,
+    # и один крошечный или огромный bbox размер сетки не портит
+    extents = sorted(e for e in (max(b[2] - b[0], b[3] - b[1]) for b in bboxes) if 0 < e < math.inf)
+    return extents[len(extents) // 2] if extents else 1.0
+
+
+class GridIndex:
+    '''Инкрементальный индекс на равномерной сетке.
+
+    Каждый объект регистрируется во всех ячейках, которые покрывает его bbox.
+    Запрос возвращает только объекты, чей bbox пересекается с заданным.
+    Если cell_size не задан, он берётся по размеру первого вставленного bbox;
+    когда набор известен заранее, лучше передать median_cell_size(bboxes).
+    Объекты, занимающие больше max_cells ячеек (и с бесконечными координатами),
+    в сетку не попадают: они лежат отдельным списком и проверяются при каждом запросе.
+    '''
+
+    def __init__(self, cell_size=None, max_cells=64):
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self.cells = defaultdict(list)
+        self.large = []
+        self.bboxes = {}
+
+    def _cell_range(self, bbox):
+        # None, если bbox занимает слишком много ячеек
+        s = self.cell_size
+        try:
+            i0, j0 = math.floor(bbox[0] / s), math.floor(bbox[1] / s)
+            i1, j1 = math.floor(bbox[2] / s), math.floor(bbox[3] / s)
+        except (OverflowError, ValueError):
+            return None
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > self.max_cells:
+            return None
+        return i0, j0, i1, j1
+
+    def insert(self, key, bbox):
+        if self.cell_size is None:
+            self.cell_size = max(bbox[2] - bbox[0], bbox[3] - bbox[1]) or 1.0
+        self.bboxes[key] = bbox
+        cells = self._cell_range(bbox)
+        if cells is None:
+            self.large.append(key)
+            return
+        i0, j0, i1, j1 = cells
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                self.cells[(i, j)].append(key)
+
+    def _candidates(self, cells):
+        if cells is None:
+            # запрос шире max_cells ячеек: дешевле проверить все объекты подряд
+            yield from self.bboxes
+            return
+        i0, j0, i1, j1 = cells
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                yield from self.cells.get((i, j), ())
+        yield from self.large
+
+    def query(self, bbox):
+        if not self.bboxes:
+            return []
+        seen = set()
+        result = []
+        for key in self._candidates(self._cell_range(bbox)):
+            if key not in seen:
+                seen.add(key)
+                if bboxes_overlap(bbox, self.bboxes[key]):
+                    result.append(key)
+        # порядок вставки, чтобы проверки шли в том же порядке, что и при полном переборе
+        result.sort()
+        return result
+
+    def __len__(self):
+        return len(self.bboxes)
@@ -0,0 +1,148 @@
+import numpy as np
+
+from point_in_polygon import pairs_contain
+from polygon_batch import PolygonBatch
+from predicates import orient2d_det
+
+
+def _as_batch(polygons):
+    return polygons if isinstance(polygons, PolygonBatch) else PolygonBatch.from_polygons(polygons)
+
+
+def candidate_pairs(bboxes, budget=4_000_000, block=4096):
+    '''Пары (i, j) с пересекающимися bbox (касание считается). Генератор пачек массивов.
+
+    Заметание по x: bbox сортируются по xmin и обходятся блоками по block штук.
+    Активное множество блока — все bbox, начинающиеся не правее самого дальнего
+    xmax в блоке; оно упорядочивается по ymin, и для каждого bbox блока
+    двоичным поиском берутся только те, чей интервал по y может с ним
+    пересечься. Каждая пара выдаётся один раз — от того, кто раньше по xmin.
+    В пачке не больше budget кандидатов до окончательного отсева.
+    '''
+    order = np.argsort(bboxes[:, 0], kind='stable')
+    box = bboxes[order]
+    for a in range(0, len(box), block):
+        b = min(a + block, len(box))
+        hi = int(np.searchsorted(box[:, 0], box[a:b, 2].max(), side='right'))
+        active = box[a:hi]
+        by_y = np.argsort(active[:, 1], kind='stable')
+        ymin = active[by_y, 1]
+        tallest = (active[:, 3] - active[:, 1]).max()
+        lo = np.searchsorted(ymin, box[a:b, 1] - tallest, side='left')
+        up = np.searchsorted(ymin, box[a:b, 3], side='right')
+        counts = up - lo
+        work = np.cumsum(counts)
+        bounds = np.searchsorted(work, np.arange(budget, work[-1], budget), side='right')
+        bounds = np.unique(np.concatenate([[0], bounds, [b - a]]))
+        for c, d in zip(bounds[:-1], bounds[1:]):
+            k = np.repeat(np.arange(c, d), counts[c:d])
+            first = np.cumsum(counts[c:d]) - counts[c:d]
+            pos = lo[k] + np.arange(len(k)) - np.repeat(first, counts[c:d])
+            i, j = a + k, a + by_y[pos]
+            keep = ((j > i) & (box[j, 0] <= box[i, 2])
+                    & (box[j, 1] <= box[i, 3]) & (box[i, 1] <= box[j, 3]))
+            i, j = order[i[keep]], order[j[keep]]
+            yield np.minimum(i, j), np.maximum(i, j)
+
+
+def _edges_near(batch, nxt, poly, bboxes):
+    # Стороны полигонов poly[k], чей bbox задевает bboxes[k]: (номер пары, номер стороны)
+    counts = batch.counts()[poly]
+    pair = np.repeat(np.arange(len(poly)), counts)
+    first = np.cumsum(counts) - counts
+    e = np.repeat(batch.offsets[:-1][poly], counts) + np.arange(counts.sum()) - np.repeat(first, counts)
+    x1, y1, x2, y2 = batch.xs[e], batch.ys[e], batch.xs[nxt[e]], batch.ys[nxt[e]]
+    box = bboxes[pair]
+    keep = ((np.minimum(x1, x2) <= box[:, 2]) & (np.maximum(x1, x2) >= box[:, 0])
+            & (np.minimum(y1, y2) <= box[:, 3]) & (np.maximum(y1, y2) >= box[:, 1]))
+    return pair[keep], e[keep]
+
+
+def segments_intersect(p1x, p1y, p2x, p2y, q1x, q1y, q2x, q2y):
+    '''Пересекаются ли отрезки p1p2 и q1q2 (касание считается). Точно, через orient2d_det.'''
+    o1 = np.sign(orient2d_det(p1x, p1y, p2x, p2y, q1x, q1y))
+    o2 = np.sign(orient2d_det(p1x, p1y, p2x, p2y, q2x, q2y))
+    o3 = np.sign(orient2d_det(q1x, q1y, q2x, q2y, p1x, p1y))
+    o4 = np.sign(orient2d_det(q1x, q1y, q2x, q2y, p2x, p2y))
+    hit = (o1 * o2 <= 0) & (o3 * o4 <= 0)
+    # все четыре точки на одной прямой: нужны пересекающиеся проекции
+    collinear = (o1 == 0) & (o2 == 0)
+    overlap = ((np.minimum(p1x, p2x) <= np.maximum(q1x, q2x)) & (np.minimum(q1x, q2x) <= np.maximum(p1x, p2x))
+               & (np.minimum(p1y, p2y) <= np.maximum(q1y, q2y)) & (np.minimum(q1y, q2y) <= np.maximum(p1y, p2y)))
+    return hit & (~collinear | overlap)
+
+
+def _pairs_intersect(batch, nxt, bboxes, i, j):
+    # Для пар (i[k], j[k]) с пересекающимися bbox: пересекаются ли сами полигоны
+    result = np.zeros(len(i), dtype=bool)
+    pa, ea = _edges_near(batch, nxt, i, bboxes[j])
+    pb, eb = _edges_near(batch, nxt, j, bboxes[i])
+    # все сочетания оставшихся сторон внутри каждой пары
+    cb = np.bincount(pb, minlength=len(i))
+    start_b = np.cumsum(cb) - cb
+    rep = cb[pa]
+    ia = np.repeat(np.arange(len(pa)), rep)
+    first = np.cumsum(rep) - rep
+    ib = np.repeat(start_b[pa], rep) + np.arange(rep.sum()) - np.repeat(first, rep)
+    a, b = ea[ia], eb[ib]
+    xs, ys = batch.xs, batch.ys
+    hit = segments_intersect(xs[a], ys[a], xs[nxt[a]], ys[nxt[a]], xs[b], ys[b], xs[nxt[b]], ys[nxt[b]])
+    result[pa[ia[hit]]] = True
+    # без пересечения сторон полигоны пересекаются, только если один лежит внутри другого;
+    # тогда внутри и любая его вершина
+    rest = np.flatnonzero(~result)
+    if len(rest):
+        first_vertex = batch.offsets[:-1]
+        vi = first_vertex[i[rest]]
+        vj = first_vertex[j[rest]]
+        inside = pairs_contain(np.column_stack([batch.xs[vi], batch.ys[vi]]), batch, j[rest])
+        inside |= pairs_contain(np.column_stack([batch.xs[vj], batch.ys[vj]]), batch, i[rest])
+        result[rest] = inside
+    return result
+
+
+def intersecting_pairs(polygons, budget=4_000_000):
+    '''Все пары пересекающихся полигонов (касание считается, как в polygons_intersect).
+
+    polygons — итерируемое полигонов или PolygonBatch. Кандидаты находятся
+    заметанием по bbox, затем для каждой пары сравниваются только стороны,
+    задевающие bbox соседа (точные предикаты), и проверяется вложенность.
+    Возвращает массивы (i, j) с i < j, упорядоченные по i, затем по j.
+    '''
+    batch = _as_batch(polygons)
+    bboxes = batch.bboxes()
+    nonempty = np.flatnonzero(batch.counts() > 0)
+    nxt = batch._next_index()
+    counts = batch.counts()
+    found_i, found_j = [], []
+    for i, j in candidate_pairs(bboxes[nonempty], budget):
+        i, j = nonempty[i], nonempty[j]
+        # сторон на пару не больше counts[i] * counts[j]; делим так, чтобы пачка укладывалась в budget
+        work = np.cumsum(counts[i] * counts[j])
+        bounds = np.searchsorted(work, np.arange(budget, work[-1] if len(work) else 0, budget), side='right')
+        bounds = np.unique(np.concatenate([[0], bounds, [len(i)]]))
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            hit = _pairs_intersect(batch, nxt, bboxes, i[a:b], j[a:b])
+            found_i.append(i[a:b][hit])
+            found_j.append(j[a:b][hit])
+    if not found_i:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    i, j = np.concatenate(found_i), np.concatenate(found_j)
+    order = np.lexsort((j, i))
+    return i[order], j[order]
+
+
+if __name__ == "__main__":
+    import time
+    from shape_ribbon import hexagon_ribbon
+
+    # ряды шестиугольников, каждый следующий ряд наезжает на предыдущий
+    ribbon = hexagon_ribbon()
+    rows, cols = 316, 316
+    index = np.arange(rows * cols)
+    coords = ribbon.coords(index % cols)
+    coords[:, :, 1] += (index // cols * 0.8)[:, None]
+    batch = PolygonBatch.from_array(coords)
+    start = time.perf_counter()
+    i, j = intersecting_pairs(batch)
+    print(f"{len(batch)} шестиугольников: {len(i)} пересекающихся пар за {time.perf_counter() - start:.2f} с")
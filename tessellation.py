@@ -0,0 +1,91 @@
+import math
+from itertools import count
+
+import numpy as np
+
+from affine import Affine
+
+
+class Band:
+    '''Одна лента раскладки: фигуры ribbon с номерами из indices, повёрнутые на angle.
+
+    Лента сдвигается на offset вдоль нормали к своему направлению и переносится
+    в anchor. symmetry ('x' или 'y') отражает фигуры до поворота, как в 43.py.
+    indices — range или None для бесконечной ленты.
+    '''
+
+    def __init__(self, ribbon, angle=0.0, offset=0.0, anchor=(0, 0), symmetry=None, indices=None):
+        self.ribbon = ribbon
+        self.indices = indices
+        normal = (-math.sin(angle), math.cos(angle))
+        transform = Affine()
+        if symmetry is not None:
+            transform = transform.symmetry(symmetry)
+        self.transform = (transform
+                          .rotate(angle)
+                          .translate(anchor[0] + normal[0] * offset, anchor[1] + normal[1] * offset))
+
+    def chunks(self, chunk_size):
+        if self.indices is None:
+            blocks = (range(lo, lo + chunk_size) for lo in count(0, chunk_size))
+        else:
+            blocks = (self.indices[k:k + chunk_size] for k in range(0, len(self.indices), chunk_size))
+        for block in blocks:
+            yield self.transform.apply_batch(self.ribbon.batch(np.arange(block.start, block.stop, block.step)))
+
+
+class Tessellation:
+    '''Раскладка из нескольких лент, которая отдаётся пачками фиксированного размера.
+
+    chunks() по очереди берёт по пачке из каждой ленты, поэтому бесконечные
+    ленты не мешают остальным и в памяти одновременно лежит одна пачка.
+    '''
+
+    def __init__(self, bands):
+        self.bands = list(bands)
+
+    def chunks(self, chunk_size=4096):
+        # пары (номер ленты, PolygonBatch)
+        active = [(i, band.chunks(chunk_size)) for i, band in enumerate(self.bands)]
+        while active:
+            alive = []
+            for i, it in active:
+                batch = next(it, None)
+                if batch is not None:
+                    yield i, batch
+                    alive.append((i, it))
+            active = alive
+
+    def __iter__(self):
+        for _, batch in self.chunks():
+            yield from batch
+
+
+def parallel_bands(ribbons, angle, spacing, anchor=(0, 0), indices=None):
+    # Параллельные ленты под углом angle с шагом spacing по нормали, как в 4.py
+    return Tessellation(Band(r, angle, k * spacing, anchor, indices=indices) for k, r in enumerate(ribbons))
+
+
+def crossing_bands(ribbons, angles, anchor, indices=range(-7, 8)):
+    # Ленты через общую точку anchor под разными углами, как в 42.py
+    return Tessellation(Band(r, a, 0.0, anchor, indices=indices) for r, a in zip(ribbons, angles))
+
+
+def mirrored_bands(ribbon, distance, axis='x', indices=range(-7, 8)):
+    # Лента и её отражение, сдвинутое на distance, как в 43.py
+    return Tessellation([
+        Band(ribbon, indices=indices),
+        Band(ribbon, offset=distance, symmetry=axis, indices=indices),
+    ])
+
+
+if __name__ == "__main__":
+    from shape_ribbon import ShapeRibbon
+
+    rects = ShapeRibbon(((0, 0), (1, 0), (1, 1), (0, 1)), (1.2, 0))
+    tris = ShapeRibbon(((0, 0), (0.5, 1), (1, 0)), (1.2, 0))
+    layout = parallel_bands([rects, tris], math.radians(30), 1.5, indices=range(0, 1_000_000))
+    total = 0
+    for band, batch in layout.chunks(100_000):
+        total += batch.areas().sum()
+    print("Суммарная площадь двух лент по 1 млн фигур:", total)
@@ -0,0 +1,107 @@
+import importlib.util
+import itertools
+from pathlib import Path
+
+import matplotlib
+import numpy as np
+import pytest
+from shapely.geometry import Polygon as ShPolygon
+
+from sweep_intersect import intersecting_pairs
+
+matplotlib.use('Agg')
+
+
+@pytest.fixture(scope='module')
+def script63():
+    # 63.py — скрипт с демонстрацией; грузим его как модуль ради polygons_intersect
+    spec = importlib.util.spec_from_file_location('script63', Path(__file__).with_name('63.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='module')
+def polygons_intersect(script63):
+    return script63.polygons_intersect
+
+
+def random_corpus(seed, n=250):
+    # Выпуклые (в том числе с десятками вершин), невыпуклые (звёзды с вогнутыми углами),
+    # самопересекающиеся (пентаграммы, гептаграммы) и полигоны с общими вершинами
+    # и сторонами на целой сетке
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for _ in range(n):
+        kind = rng.integers(6)
+        if kind == 4:
+            x, y = rng.integers(0, 12, 2).tolist()
+            w, h = rng.integers(1, 3, 2).tolist()
+            corpus.append(((x, y), (x + w, y), (x + w, y + h), (x, y + h)))
+            continue
+        cx, cy = rng.uniform(0, 12, 2)
+        r = rng.uniform(0.3, 2.0)
+        if kind == 0:
+            k = int(rng.integers(3, 9))
+            a = np.sort(rng.uniform(0, 2 * np.pi, k))
+        elif kind == 5:
+            k = int(rng.integers(30, 60))
+            a = np.sort(rng.uniform(0, 2 * np.pi, k))
+        elif kind == 1:
+            k, a = 5, 4 * np.pi * np.arange(5) / 5
+        elif kind == 2:
+            k, a = 7, 6 * np.pi * np.arange(7) / 7
+        else:
+            k = 8
+            a = 2 * np.pi * np.arange(k) / k
+            r = r * np.tile([1.0, 0.4], k // 2)
+        a = a + rng.uniform(0, 2 * np.pi)
+        corpus.append(tuple(zip((cx + r * np.cos(a)).tolist(), (cy + r * np.sin(a)).tolist())))
+    return corpus
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_sweep_matches_pairwise(seed, polygons_intersect):
+    corpus = random_corpus(seed)
+    i, j = intersecting_pairs(corpus)
+    found = set(zip(i.tolist(), j.tolist()))
+    expected = {(a, b) for a, b in itertools.combinations(range(len(corpus)), 2)
+                if polygons_intersect(corpus[a], corpus[b])}
+    assert found == expected
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_pairwise_matches_shapely(seed, polygons_intersect):
+    # Быстрый путь по разделяющей оси не должен расходиться с shapely, в том числе на звёздах
+    corpus = random_corpus(seed)
+    shapes = [ShPolygon(p) for p in corpus]
+    for a, b in itertools.combinations(range(len(corpus)), 2):
+        assert polygons_intersect(corpus[a], corpus[b]) == shapes[a].intersects(shapes[b]), (a, b)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_batched_pairs_match_pairwise(seed, script63):
+    # Пачечная проверка кандидатов в 63.py (разделяющая ось + shapely.intersects) — та же, что попарная
+    corpus = random_corpus(seed)
+    i, j = script63.find_intersecting_pairs(corpus)
+    found = set(zip(i.tolist(), j.tolist()))
+    expected = {(a, b) for a, b in itertools.combinations(range(len(corpus)), 2)
+                if script63.polygons_intersect(corpus[a], corpus[b])}
+    assert found == expected
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_filter_non_intersecting_is_greedy(seed, script63):
+    corpus = random_corpus(seed)
+    kept = []
+    for p in corpus:
+        if not any(script63.polygons_intersect(p, q) for q in kept):
+            kept.append(p)
+    assert script63.filter_non_intersecting(corpus) == kept
+
+
+def test_pairs_are_ordered_and_unique():
+    i, j = intersecting_pairs(random_corpus(7))
+    assert (i < j).all()
+    assert np.array_equal(np.lexsort((j, i)), np.arange(len(i)))
+    assert len(set(zip(i.tolist(), j.tolist()))) == len(i)
@@ -0,0 +1,296 @@
+import math
+
+import numpy as np
+
+from polygon_batch import PolygonBatch
+
+
+# Относительный запас к границам поиска: разные d2 могут дать один и тот же sqrt(d2),
+# а numpy считает квадрат умножением, тогда как dist_to_origin — через pow (см. _distances)
+_SLACK = 1.0 + 16.0 * np.finfo(np.float64).eps
+
+
+def _distances(dx, dy):
+    # sqrt(dx**2 + dy**2) по той же формуле, что dist_to_origin в 8.py: ** у float идёт
+    # через pow из libm, а он изредка расходится с dx * dx в последнем бите.
+    # Считается только для кандидатов у самой границы выбора, поэтому цикл недорог
+    return np.fromiter((math.sqrt(a**2 + b**2) for a, b in zip(dx.tolist(), dy.tolist())),
+                       dtype=np.float64, count=len(dx))
+
+
+def _queries(points):
+    # Одна точка (x, y) или массив точек формы (m, 2); второе значение — была ли точка одна
+    points = np.asarray(points, dtype=np.float64)
+    single = points.ndim == 1
+    return points.reshape(-1, 2), single
+
+
+def _top(q, ids, dist, m, k, tie):
+    # k ближайших различных ids для каждого запроса: массивы (m, k), пустые места — -1 и inf.
+    # При равных расстояниях раньше идёт меньший tie (ключ, заданный для каждого id).
+    key = q * (int(ids.max(initial=0)) + 1) + ids
+    order = np.lexsort((dist, key))
+    q, ids, dist, tie, key = q[order], ids[order], dist[order], tie[order], key[order]
+    first = np.ones(len(q), dtype=bool)
+    first[1:] = key[1:] != key[:-1]
+    q, ids, dist, tie = q[first], ids[first], dist[first], tie[first]
+    order = np.lexsort((tie, dist, q))
+    q, ids, dist = q[order], ids[order], dist[order]
+    starts = np.searchsorted(q, np.arange(m))
+    rank = np.arange(len(q)) - starts[q]
+    keep = rank < k
+    top_ids = np.full((m, k), -1, dtype=np.int64)
+    top_dist = np.full((m, k), np.inf)
+    top_ids[q[keep], rank[keep]] = ids[keep]
+    top_dist[q[keep], rank[keep]] = dist[keep]
+    return top_ids, top_dist
+
+
+class VertexIndex:
+    '''KD-дерево по вершинам набора полигонов: строится один раз, отвечает на запросы близости.
+
+    Вершины переставлены так, что каждый узел дерева — отрезок [start, end)
+    переставленного массива; узел делится пополам по медиане вдоль длинной
+    стороны своего bbox, листья — не больше leaf_size вершин. Запросы
+    принимают одну точку или массив точек формы (m, 2) и обходят дерево сразу
+    для всех точек: на каждом уровне отбрасываются узлы, чей bbox дальше
+    текущей границы поиска. Расстояние — sqrt(dx**2 + dy**2), как
+    dist_to_origin в 8.py: кандидаты у границы выбора пересчитываются по
+    той же формуле (_distances), ранжируются сами корни, и из полигонов с
+    равными корнями выбирается более поздний, как в agr_origin_nearest_reduce,
+    поэтому ответы с ним совпадают.
+    '''
+
+    def __init__(self, polygons, leaf_size=32, block=4096):
+        batch = polygons if isinstance(polygons, PolygonBatch) else PolygonBatch.from_polygons(polygons)
+        if len(batch.xs) == 0:
+            raise ValueError("no vertices to index")
+        self.batch = batch
+        self.polygon_ids = batch.polygon_ids()
+        self.block = block
+        xs, ys = batch.xs, batch.ys
+        order = np.arange(len(xs))
+        start, end, depth, left, right, axis, split = [0], [len(xs)], [0], [-1], [-1], [0], [0.0]
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            a, b = start[node], end[node]
+            if b - a <= leaf_size:
+                continue
+            idx = order[a:b]
+            px, py = xs[idx], ys[idx]
+            ax = 0 if np.ptp(px) >= np.ptp(py) else 1
+            values = px if ax == 0 else py
+            mid = (b - a) // 2
+            part = np.argpartition(values, mid)
+            order[a:b] = idx[part]
+            axis[node], split[node] = ax, values[part[mid]]
+            left[node], right[node] = len(start), len(start) + 1
+            for lo, hi in ((a, a + mid), (a + mid, b)):
+                stack.append(len(start))
+                start.append(lo)
+                end.append(hi)
+                depth.append(depth[node] + 1)
+                left.append(-1)
+                right.append(-1)
+                axis.append(0)
+                split.append(0.0)
+        self.order = order
+        self.xs, self.ys = xs[order], ys[order]
+        self.start = np.array(start, dtype=np.int64)
+        self.size = np.array(end, dtype=np.int64) - self.start
+        self.left = np.array(left, dtype=np.int64)
+        self.right = np.array(right, dtype=np.int64)
+        self.axis = np.array(axis, dtype=np.int64)
+        self.split = np.array(split, dtype=np.float64)
+        # bbox узлов: листья — по своим вершинам, остальные — снизу вверх по уровням из детей
+        self.bbox = np.empty((len(start), 4))
+        leaves = np.flatnonzero(self.left < 0)
+        leaves = leaves[np.argsort(self.start[leaves])]
+        for col, (coords, reduce) in enumerate(((self.xs, np.minimum), (self.ys, np.minimum),
+                                                 (self.xs, np.maximum), (self.ys, np.maximum))):
+            self.bbox[leaves, col] = reduce.reduceat(coords, self.start[leaves])
+        depth = np.array(depth)
+        for level in range(depth.max() - 1, -1, -1):
+            inner = np.flatnonzero((depth == level) & (self.left >= 0))
+            lo, hi = self.bbox[self.left[inner]], self.bbox[self.right[inner]]
+            self.bbox[inner, :2] = np.minimum(lo[:, :2], hi[:, :2])
+            self.bbox[inner, 2:] = np.maximum(lo[:, 2:], hi[:, 2:])
+
+    def __len__(self):
+        return len(self.order)
+
+    def _leaf_of(self, qx, qy):
+        # Лист, в который спускается каждая точка запроса
+        node = np.zeros(len(qx), dtype=np.int64)
+        inner = np.flatnonzero(self.left[node] >= 0)
+        while len(inner):
+            n = node[inner]
+            coord = np.where(self.axis[n] == 0, qx[inner], qy[inner])
+            node[inner] = np.where(coord < self.split[n], self.left[n], self.right[n])
+            inner = inner[self.left[node[inner]] >= 0]
+        return node
+
+    def _expand(self, q, leaf, qx, qy):
+        # Пары (запрос, позиция вершины) для всех вершин листьев leaf и квадраты расстояний
+        counts = self.size[leaf]
+        first = np.cumsum(counts) - counts
+        pos = np.repeat(self.start[leaf] - first, counts) + np.arange(counts.sum())
+        q = np.repeat(q, counts)
+        dx = self.xs[pos] - qx[q]
+        dy = self.ys[pos] - qy[q]
+        return q, pos, dx ** 2 + dy ** 2
+
+    def _within(self, qx, qy, r2):
+        # Все пары (запрос, позиция вершины) с квадратом расстояния не больше r2[запрос]
+        q = np.arange(len(qx))
+        node = np.zeros(len(qx), dtype=np.int64)
+        leaves_q, leaves = [], []
+        while len(q):
+            box = self.bbox[node]
+            dx = np.maximum(np.maximum(box[:, 0] - qx[q], qx[q] - box[:, 2]), 0.0)
+            dy = np.maximum(np.maximum(box[:, 1] - qy[q], qy[q] - box[:, 3]), 0.0)
+            near = dx ** 2 + dy ** 2 <= r2[q]
+            q, node = q[near], node[near]
+            leaf = self.left[node] < 0
+            leaves_q.append(q[leaf])
+            leaves.append(node[leaf])
+            q, node = q[~leaf], node[~leaf]
+            q = np.concatenate([q, q])
+            node = np.concatenate([self.left[node], self.right[node]])
+        q, pos, d2 = self._expand(np.concatenate(leaves_q), np.concatenate(leaves), qx, qy)
+        keep = d2 <= r2[q]
+        return q[keep], pos[keep], d2[keep]
+
+    def _exact(self, q, pos, qx, qy):
+        return _distances(self.xs[pos] - qx[q], self.ys[pos] - qy[q])
+
+    def _blocks(self, points):
+        for a in range(0, len(points), self.block):
+            chunk = points[a:a + self.block]
+            yield chunk[:, 0], chunk[:, 1]
+
+    def nearest_vertex(self, points):
+        '''Ближайшая вершина: (номер полигона, номер вершины в batch.xs/ys, расстояние).
+
+        Для массива точек — три массива длины m. При равных расстояниях
+        выбирается вершина более позднего полигона (как в agr_origin_nearest_reduce),
+        а внутри полигона — первая из равноудалённых (как min по dist_to_origin).
+        '''
+        points, single = _queries(points)
+        vertex, distance = [], []
+        for qx, qy in self._blocks(points):
+            m = len(qx)
+            q, pos, d2 = self._expand(np.arange(m), self._leaf_of(qx, qy), qx, qy)
+            bound = np.full(m, np.inf)
+            np.minimum.at(bound, q, d2)
+            q, pos, d2 = self._within(qx, qy, bound * _SLACK)
+            vertex_ids = self.order[pos]
+            tie = vertex_ids - self.polygon_ids[vertex_ids] * len(self)
+            # кандидаты — только равные минимуму с точностью до запаса, их мало
+            best, best_dist = _top(q, vertex_ids, self._exact(q, pos, qx, qy), m, 1, tie)
+            vertex.append(best[:, 0])
+            distance.append(best_dist[:, 0])
+        vertex, distance = np.concatenate(vertex), np.concatenate(distance)
+        polygon = self.polygon_ids[vertex]
+        if single:
+            return int(polygon[0]), int(vertex[0]), float(distance[0])
+        return polygon, vertex, distance
+
+    def nearest_polygons(self, points, k=1):
+        '''k полигонов с ближайшими вершинами: (номера, расстояния), массивы формы (m, k).
+
+        Расстояние до полигона — до ближайшей его вершины; при равенстве раньше
+        идёт больший номер, как в agr_origin_nearest_reduce. Если полигонов меньше k, хвост заполнен -1 и inf.
+        Для одной точки — массивы длины k.
+        '''
+        points, single = _queries(points)
+        ids, distance = [], []
+        box = self.bbox[0]
+        for qx, qy in self._blocks(points):
+            m = len(qx)
+            # граница поиска — k-й полигон в своём листе; если их там меньше,
+            # граница растёт вчетверо (по радиусу — вдвое), пока не найдётся k
+            q, pos, d2 = self._expand(np.arange(m), self._leaf_of(qx, qy), qx, qy)
+            ids_here = self.polygon_ids[self.order[pos]]
+            top, top_dist = _top(q, ids_here, np.sqrt(d2), m, k, -ids_here)
+            bound = top_dist[:, -1] ** 2 * _SLACK
+            grow = np.isinf(bound)
+            if grow.any():
+                farthest = np.zeros(m)
+                np.maximum.at(farthest, q, d2)
+                bound[grow] = np.maximum(farthest[grow] * _SLACK, np.finfo(np.float64).tiny)
+            # дальше угла корневого bbox вершин нет: с такой границей найдено всё
+            cover = np.maximum((qx - box[0]) ** 2, (qx - box[2]) ** 2) + np.maximum((qy - box[1]) ** 2, (qy - box[3]) ** 2)
+            todo = np.arange(m)
+            while len(todo):
+                q, pos, d2 = self._within(qx[todo], qy[todo], bound[todo])
+                ids_here = self.polygon_ids[self.order[pos]]
+                dist = np.sqrt(d2)
+                sub, sub_dist = _top(q, ids_here, dist, len(todo), k, -ids_here)
+                # порядок и ответ решают только вершины, равные с точностью до запаса
+                # одному из k выбранных расстояний: их расстояния пересчитываются точно
+                near = np.zeros(len(q), dtype=bool)
+                for col in range(k):
+                    chosen = sub_dist[q, col]
+                    near |= np.abs(dist - chosen) <= (_SLACK - 1.0) * chosen
+                q, pos, ids_here = q[near], pos[near], ids_here[near]
+                sub, sub_dist = _top(q, ids_here, self._exact(q, pos, qx[todo], qy[todo]), len(todo), k, -ids_here)
+                done = (sub[:, -1] >= 0) | (bound[todo] >= cover[todo])
+                top[todo[done]], top_dist[todo[done]] = sub[done], sub_dist[done]
+                todo = todo[~done]
+                bound[todo] *= 4.0
+            ids.append(top)
+            distance.append(top_dist)
+        ids, distance = np.concatenate(ids), np.concatenate(distance)
+        if single:
+            return ids[0], distance[0]
+        return ids, distance
+
+    def within(self, points, radius):
+        '''Полигоны, у которых есть вершина не дальше radius от точки: номера по возрастанию.
+
+        Для массива точек — список массивов, по одному на точку; radius — число
+        или массив длины m.
+        '''
+        points, single = _queries(points)
+        radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), (len(points),))
+        result = []
+        for a, (qx, qy) in zip(range(0, len(points), self.block), self._blocks(points)):
+            r = radius[a:a + len(qx)]
+            # граница по квадрату с запасом, окончательно — по sqrt, у самого радиуса — как в dist_to_origin
+            q, pos, d2 = self._within(qx, qy, r ** 2 * _SLACK)
+            dist = np.sqrt(d2)
+            edge = np.flatnonzero(np.abs(dist - r[q]) <= (_SLACK - 1.0) * r[q])
+            dist[edge] = self._exact(q[edge], pos[edge], qx, qy)
+            keep = dist <= r[q]
+            pairs = np.unique(q[keep] * len(self.batch) + self.polygon_ids[self.order[pos[keep]]])
+            q, ids = np.divmod(pairs, len(self.batch))
+            result.extend(np.split(ids, np.searchsorted(q, np.arange(1, len(qx)))))
+        return result[0] if single else result
+
+
+if __name__ == "__main__":
+    import time
+    from shape_ribbon import hexagon_ribbon
+
+    ribbon = hexagon_ribbon()
+    n = 200_000
+    batch = PolygonBatch.from_array(ribbon.coords(np.arange(n)))
+    start = time.perf_counter()
+    index = VertexIndex(batch)
+    print(f"Индекс по {len(index)} вершинам построен за {time.perf_counter() - start:.2f} с")
+    rng = np.random.default_rng(0)
+    box = index.bbox[0]
+    queries = rng.uniform(box[:2], box[2:], size=(10_000, 2))
+    start = time.perf_counter()
+    polygon, vertex, distance = index.nearest_vertex(queries)
+    print(f"Ближайшие вершины для {len(queries)} точек за {time.perf_counter() - start:.3f} с")
+    start = time.perf_counter()
+    ids, distances = index.nearest_polygons(queries, k=5)
+    print(f"5 ближайших полигонов для {len(queries)} точек за {time.perf_counter() - start:.3f} с")
+    start = time.perf_counter()
+    found = index.within(queries, 1.0)
+    print(f"Полигоны в радиусе 1: в среднем {np.mean([len(f) for f in found]):.1f} на точку "
+          f"за {time.perf_counter() - start:.3f} с")
+    print("Ближайший к началу координат полигон:", index.nearest_vertex((0.0, 0.0)))
@@ -1,7 +1,6 @@
 import itertools
 import math
-import matplotlib.pyplot as plt
-from matplotlib.patches import Polygon
+from render import new_figure, draw_polygons, finish_figure
 
 def gen_rectangle(start_x=0, side=1, gap=0.3):
     width = side
@@ -35,15 +34,13 @@ def gen_hexagon(start_x=0, side=0.577, gap=0.3):
         yield tuple(points)
         x += width + gap
 
-def visualize_polygons(polygons, count=10):
-    fig, ax = plt.subplots()
-    for poly in itertools.islice(polygons, count):
-        patch = Polygon(poly, closed=True, edgecolor='black', facecolor='none', lw=1.5)
-        ax.add_patch(patch)
+def visualize_polygons(polygons, count=10, path=None):
+    fig, ax = new_figure((6.4, 4.8), path)
+    draw_polygons(ax, list(itertools.islice(polygons, count)), edgecolor='black', facecolor='none', lw=1.5)
     ax.set_aspect('equal')
     ax.autoscale_view()
-    plt.grid(True)
-    plt.show()
+    ax.grid(True)
+    finish_figure(fig, path)
 
 def combined_sequence():
     gap = 0.3